@@ -1,19 +1,87 @@
+import hashlib
+import time
+from types import MappingProxyType
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from cachetools import TLRUCache, TTLCache
+import jwt
+from jwt import InvalidTokenError as JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import TypeAdapter
 from app.config import settings
-from app.database import get_supabase
+from app.database import get_supabase_async
 from app.models import User
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: argon2id for new hashes (much cheaper than bcrypt at
+# equivalent security), bcrypt kept so existing hashes still verify and get
+# rehashed on the next successful login via deprecated="auto".
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__memory_cost=19456,
+    argon2__time_cost=2,
+    argon2__parallelism=1,
+)
 
 # HTTP Bearer token
 security = HTTPBearer()
 
+# Verified-token cache: clients reuse the same bearer token for its whole
+# lifetime, so skip re-running signature verification on every request.
+# Each entry expires when the token itself does (never after).
+_TOKEN_CACHE_MAX_TTL = settings.access_token_expire_minutes * 60
+
+
+def _token_ttu(_key, payload: dict, now: float) -> float:
+    return min(payload.get("exp", now), now + _TOKEN_CACHE_MAX_TTL)
+
+
+_token_cache = TLRUCache(maxsize=10_000, ttu=_token_ttu, timer=time.time)
+
+# Short-TTL user cache: user rows change rarely, so skip the per-request
+# Supabase round trip in get_current_user. Invalidate whenever a user row
+# is mutated (e.g. tier change) via invalidate_user_cache().
+_user_cache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def invalidate_user_cache(user_id: str):
+    """Drop a cached user so the next request re-fetches from the database"""
+    _user_cache.pop(user_id, None)
+
+
+# Positive project-ownership checks, cached briefly. Chatty clients probe
+# the same (project_id, user_id) pair dozens of times a minute; ownership
+# transitions are rare and the TTL bounds staleness. Only hits are cached —
+# misses always go to the database.
+_ownership_cache = TTLCache(maxsize=10_000, ttl=30)
+
+
+def ownership_cached(project_id: str, user_id: str) -> bool:
+    """True if this user's ownership of the project was recently verified"""
+    return (project_id, user_id) in _ownership_cache
+
+
+def cache_ownership(project_id: str, user_id: str):
+    """Record a verified ownership check"""
+    _ownership_cache[(project_id, user_id)] = True
+
+
+def invalidate_ownership_cache(project_id: str):
+    """Drop cached ownership entries for a project (call on update/delete)"""
+    for key in [key for key in _ownership_cache if key[0] == project_id]:
+        _ownership_cache.pop(key, None)
+
+
+# Reusable compiled validator; cheaper per call than User(**row), which
+# rebuilds validation state on every construction
+user_adapter = TypeAdapter(User)
+
+# Exactly the columns the User model carries; in particular this keeps
+# password_hash off the wire on every authenticated request
+USER_COLUMNS = "id, email, name, tier, credits_remaining, created_at, updated_at"
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -40,16 +108,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_token(token: str) -> dict:
     """Decode and verify a JWT token"""
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
     except JWTError:
+        # Never cache failures; retries must re-verify
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    _token_cache[cache_key] = payload
+    return payload
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -65,18 +141,24 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
     
-    # Fetch user from database
-    supabase = get_supabase()
-    response = supabase.table("users").select("*").eq("id", user_id).execute()
-    
+    # Fetch user from cache, falling back to the database
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    supabase = await get_supabase_async()
+    response = await supabase.table("users").select(USER_COLUMNS).eq("id", user_id).execute()
+
     if not response.data:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    
+
     user_data = response.data[0]
-    return User(**user_data)
+    user = user_adapter.validate_python(user_data)
+    _user_cache[user_id] = user
+    return user
 
 
 def check_project_access(user: User, project_user_id: str):
@@ -88,15 +170,18 @@ def check_project_access(user: User, project_user_id: str):
         )
 
 
+# Project limits per tier; None means unlimited. Frozen at module scope so
+# the hot project-creation path does no per-call dict building.
+TIER_LIMITS = MappingProxyType({
+    "free": 1,
+    "pro": None,
+    "premium": None,
+})
+
+
 def check_tier_limits(user: User, projects_count: int):
     """Check if user has exceeded tier limits"""
-    limits = {
-        "free": 1,
-        "pro": None,  # Unlimited
-        "premium": None,  # Unlimited
-    }
-    
-    limit = limits.get(user.tier)
+    limit = TIER_LIMITS.get(user.tier)
     if limit is not None and projects_count >= limit:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,37 +1,63 @@
-from pydantic_settings import BaseSettings
+from functools import cached_property, lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 
 
 class Settings(BaseSettings):
+    # Frozen so pydantic skips mutation machinery and instances are safely
+    # shareable across workers/tests
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, frozen=True)
+
     # Supabase
     supabase_url: str
     supabase_key: str
     supabase_service_key: str
-    
+    # Direct Postgres DSN for the asyncpg pool; empty disables it and
+    # keeps everything on the PostgREST path
+    database_url: str = ""
+
     # JWT
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
-    
+
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     cors_origins: str = "http://localhost:3000"
-    
+
     # AI Configuration
     google_api_key: str = ""
     deepseek_api_key: str = ""
-    
+    # Collect concurrent chat completions into batched LLM calls
+    enable_dynamic_batch: bool = False
+    # Agno per-step logging; keep off in production — the prints serialize
+    # through the stdout lock under concurrency
+    ai_verbose: bool = False
+    ai_max_batch_size: int = 32
+    ai_batch_wait_timeout_s: float = 0.005
+    # Exact-match response cache for repeated prompts; ttl <= 0 disables
+    ai_cache_ttl_s: float = 300.0
+    ai_cache_maxsize: int = 1024
+    # Local traffic shaping toward provider ceilings; 0 disables a bucket
+    gemini_rpm: float = 240.0
+    gemini_tpm: float = 4_000_000.0
+    deepseek_rpm: float = 0.0
+    deepseek_tpm: float = 0.0
+
     # E2B
     e2b_api_key: str = ""
-    
-    @property
+
+    @cached_property
     def cors_origins_list(self) -> List[str]:
+        # Split once; the parsed list is reused on every subsequent access
         return [origin.strip() for origin in self.cors_origins.split(",")]
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Build Settings once; repeated calls (tests, worker forks, DI) reuse it"""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,11 +1,54 @@
-from supabase import create_client, Client
+from typing import Optional
+import httpx
+from supabase import create_client, Client, acreate_client, AsyncClient
+from supabase.lib.client_options import ClientOptions
 from app.config import settings
 
+
+def _client_options() -> ClientOptions:
+    # Bounded timeouts so a slow Supabase call cannot hang a worker. The
+    # module-level clients are shared process-wide, which keeps the
+    # underlying httpx keep-alive pool warm — no per-request TCP/TLS setup.
+    return ClientOptions(postgrest_client_timeout=10, storage_client_timeout=10)
+
+
+# Supabase's session-mode pooler admits ~15 client connections; bound the
+# PostgREST httpx pool below that so a traffic spike queues locally
+# instead of drawing "max client connections reached" errors upstream,
+# and keep a handful of connections warm to skip TCP+TLS setup.
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0
+)
+
+
+def _bound_pool(client) -> None:
+    """Swap the PostgREST session's transport for one with explicit limits.
+
+    supabase-py 2.6 offers no ClientOptions hook for httpx pool limits,
+    so the connection pool is replaced in place; base URL, headers and
+    timeout on the session are untouched.
+    """
+    session = client.postgrest.session
+    if isinstance(session, httpx.AsyncClient):
+        session._transport = httpx.AsyncHTTPTransport(limits=_HTTP_LIMITS)
+    else:
+        session._transport = httpx.HTTPTransport(limits=_HTTP_LIMITS)
+
+
 # Initialize Supabase client
-supabase: Client = create_client(settings.supabase_url, settings.supabase_key)
+supabase: Client = create_client(
+    settings.supabase_url, settings.supabase_key, options=_client_options()
+)
+_bound_pool(supabase)
 
 # Service role client for admin operations
-supabase_admin: Client = create_client(settings.supabase_url, settings.supabase_service_key)
+supabase_admin: Client = create_client(
+    settings.supabase_url, settings.supabase_service_key, options=_client_options()
+)
+_bound_pool(supabase_admin)
+
+# Shared async client; created lazily because acreate_client is a coroutine
+_supabase_async: Optional[AsyncClient] = None
 
 
 def get_supabase() -> Client:
@@ -16,3 +59,64 @@ def get_supabase() -> Client:
 def get_supabase_admin() -> Client:
     """Get Supabase admin client instance"""
     return supabase_admin
+
+
+async def get_supabase_async() -> AsyncClient:
+    """Get the shared async Supabase client, creating it on first use.
+
+    Unlike the sync client, awaiting its requests lets network waits overlap
+    instead of blocking the event loop for a full round trip per query.
+    """
+    global _supabase_async
+    if _supabase_async is None:
+        _supabase_async = await acreate_client(
+            settings.supabase_url, settings.supabase_key, options=_client_options()
+        )
+        _bound_pool(_supabase_async)
+    return _supabase_async
+
+
+# Direct-Postgres pool for aggregation-heavy reads; skips PostgREST's HTTP
+# and JSON layers. Created lazily and only when database_url is configured.
+_pg_pool = None
+
+
+async def get_pg_pool():
+    """Get the shared asyncpg pool, creating it on first use.
+
+    statement_cache_size=0 keeps this safe behind Supavisor in transaction
+    mode, where server-side prepared statements are not sticky.
+    """
+    global _pg_pool
+    if _pg_pool is None:
+        import asyncpg
+
+        _pg_pool = await asyncpg.create_pool(
+            settings.database_url,
+            min_size=2,
+            max_size=10,
+            command_timeout=30,
+            statement_cache_size=0,
+        )
+    return _pg_pool
+
+
+async def supabase_keepalive(interval: float = 30.0):
+    """Periodically ping PostgREST so pooled keep-alive connections stay warm.
+
+    Run as a background task from the app lifespan; without it, idle pools
+    get closed upstream and the next request pays a fresh TCP+TLS handshake.
+    """
+    import asyncio
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            client = await get_supabase_async()
+            await client.table("users")\
+                .select("id", count="exact", head=True)\
+                .limit(1)\
+                .execute()
+        except Exception:
+            # Best-effort: the next real query re-establishes the pool
+            pass
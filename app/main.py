@@ -1,12 +1,31 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.config import settings
+from app.database import get_supabase_async, supabase_keepalive
 from app.routers import auth, projects, specs, files, agents, chat, subscription, status
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the shared async Supabase client at startup so the first request
+    # doesn't pay client construction, then keep its pool alive.
+    await get_supabase_async()
+    keepalive = asyncio.create_task(supabase_keepalive())
+    yield
+    keepalive.cancel()
+
+
 app = FastAPI(
     title="Spec-Driven AI App Builder API",
     description="Backend API for the Spec-Driven AI App Builder platform",
     version="1.0.0",
+    # orjson serializes datetimes/UUIDs in C, several times faster than
+    # the default json-based encoder
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -45,10 +64,15 @@ async def health_check():
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
+    # uvloop + httptools move the event loop and HTTP parsing into C;
+    # uvicorn[standard] ships both. Use run.py for auto-reload in dev.
     uvicorn.run(
         "app.main:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=True
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count(),
     )
@@ -98,9 +98,9 @@ class ChatMessage(BaseModel):
     message: str
 
 
-# ComponentIntegration model disabled for now
-# class ComponentIntegration(BaseModel):
-#     component_id: str
+# Marketplace routes are disabled in main.py, but the models stay importable
+class ComponentIntegration(BaseModel):
+    component_id: str
 
 
 class SubscriptionUpgrade(BaseModel):
@@ -206,20 +206,20 @@ class ChatMessageResponse(BaseModel):
     attachments: Optional[List[Dict[str, Any]]]
 
 
-# MarketplaceComponent model disabled for now
-# class MarketplaceComponent(BaseModel):
-#     id: str
-#     name: str
-#     description: str
-#     category: str
-#     tags: List[str]
-#     preview_url: Optional[str]
-#     spec_template: Dict[str, Any]
-#     code_template: Dict[str, Any]
-#     dependencies: List[str]
-#     downloads: int
-#     rating: float
-#     created_at: datetime
+# Marketplace routes are disabled in main.py, but the model stays importable
+class MarketplaceComponent(BaseModel):
+    id: str
+    name: str
+    description: str
+    category: str
+    tags: List[str]
+    preview_url: Optional[str]
+    spec_template: Dict[str, Any]
+    code_template: Dict[str, Any]
+    dependencies: List[str]
+    downloads: int
+    rating: float
+    created_at: datetime
 
 
 class BuildJob(BaseModel):
@@ -1,12 +1,67 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Response, status, Depends
+from typing import List, Optional
 from app.models import Task, TaskCreate, CodeChange, ChangeModification, User
-from app.auth import get_current_user
-from app.database import get_supabase
+from app.auth import get_current_user, ownership_cached, cache_ownership
+from app.database import get_supabase_async
+import asyncio
+import base64
+import json
 import uuid
+import zlib
 
 router = APIRouter()
 
+# Task context/output payloads above this serialized size are stored
+# zlib-compressed to cut the bytes shipped to and stored in Supabase
+_COMPRESS_THRESHOLD = 1024
+
+
+def _pack_context(context: Optional[dict]) -> Optional[dict]:
+    """Compress a large JSON payload into a {"__zlib__": ...} envelope"""
+    if context is None:
+        return None
+    raw = json.dumps(context, separators=(",", ":")).encode()
+    if len(raw) < _COMPRESS_THRESHOLD:
+        return context
+    return {"__zlib__": base64.b64encode(zlib.compress(raw)).decode()}
+
+
+def _unpack_context(context: Optional[dict]) -> Optional[dict]:
+    """Reverse _pack_context; plain payloads pass through unchanged"""
+    if isinstance(context, dict) and "__zlib__" in context:
+        return json.loads(zlib.decompress(base64.b64decode(context["__zlib__"])))
+    return context
+
+
+# Generated files larger than this get their diff built in a worker thread
+_DIFF_OFFLOAD_THRESHOLD = 1_000_000
+
+
+def _build_diff(file_content: str) -> str:
+    """Prefix every line with '+ ' — one C-level pass over the string"""
+    return "+ " + file_content.replace("\n", "\n+ ")
+
+
+async def verify_project_access(supabase, project_id: str, user_id: str) -> dict:
+    """Check project existence and ownership in a single query"""
+    if ownership_cached(project_id, user_id):
+        return {"id": project_id}
+
+    response = await supabase.table("projects")\
+        .select("id")\
+        .eq("id", project_id)\
+        .eq("user_id", user_id)\
+        .execute()
+
+    if not response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    cache_ownership(project_id, user_id)
+    return response.data[0]
+
 
 @router.post("/tasks", response_model=Task)
 async def submit_task(
@@ -15,25 +70,10 @@ async def submit_task(
     current_user: User = Depends(get_current_user)
 ):
     """Submit a task to an agent"""
-    supabase = get_supabase()
+    supabase = await get_supabase_async()
     
     # Verify project access
-    project_response = supabase.table("projects")\
-        .select("user_id")\
-        .eq("id", project_id)\
-        .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    if project_response.data[0]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    await verify_project_access(supabase, project_id, current_user.id)
     
     # Create task
     import uuid
@@ -44,44 +84,51 @@ async def submit_task(
         "agent_type": task_data.agent_type,
         "description": task_data.description,
         "status": "pending",
-        "input_context": {"user_request": task_data.description},
+        "input_context": _pack_context({"user_request": task_data.description}),
     }
-    
-    task_response = supabase.table("tasks").insert(task_data_dict).execute()
-    
+
+    task_response = await supabase.table("tasks").insert(task_data_dict).execute()
+
     # Process agent task with AI
     await process_agent_task(task_id, task_data.agent_type, task_data.description, current_user)
-    
-    return Task(**task_response.data[0])
+
+    task_row = task_response.data[0]
+    task_row["input_context"] = _unpack_context(task_row["input_context"])
+    return Task(**task_row)
 
 
 async def process_agent_task(task_id: str, agent_type: str, description: str, user: User):
     """Process a task with the appropriate agent using AI"""
     from app.services.ai_service import ai_service
-    supabase = get_supabase()
+    supabase = await get_supabase_async()
     
     # Get project context
-    task_response = supabase.table("tasks").select("project_id").eq("id", task_id).execute()
+    task_response = await supabase.table("tasks").select("project_id").eq("id", task_id).execute()
     project_id = task_response.data[0]["project_id"] if task_response.data else None
     
     project_context = {}
     if project_id:
         # Get project specs for context
-        specs = supabase.table("spec_files").select("file_type, content").eq("project_id", project_id).execute()
+        specs = await supabase.table("spec_files").select("file_type, content").eq("project_id", project_id).execute()
         project_context = {spec["file_type"]: spec["content"][:1000] for spec in specs.data}
     
     # Generate code using AI service
     code_result = await ai_service.generate_code(user, description, agent_type, project_context)
     
-    # Create code changes for each generated file
+    # Create code changes for all generated files in one bulk insert
+    # (PostgREST accepts a list of rows, so N files cost one round trip)
+    changes = []
     for file_path, file_content in code_result["files"].items():
-        change_id = str(uuid.uuid4())
-        
-        # Create diff format
-        diff = "\n".join([f"+ {line}" for line in file_content.split("\n")])
-        
-        change_data = {
-            "id": change_id,
+        # Create diff format: a single C-level replace instead of
+        # materializing a per-line list of strings. Multi-megabyte files
+        # still take visible wall time, so push those off the event loop.
+        if len(file_content) > _DIFF_OFFLOAD_THRESHOLD:
+            diff = await asyncio.to_thread(_build_diff, file_content)
+        else:
+            diff = _build_diff(file_content)
+
+        changes.append({
+            "id": str(uuid.uuid4()),
             "task_id": task_id,
             "file_path": file_path,
             "change_type": "create",
@@ -89,15 +136,16 @@ async def process_agent_task(task_id: str, agent_type: str, description: str, us
             "agent_type": agent_type,
             "reasoning": code_result["reasoning"],
             "approved": None,  # Pending approval
-        }
-        
-        supabase.table("code_changes").insert(change_data).execute()
+        })
+
+    if changes:
+        await supabase.table("code_changes").insert(changes).execute()
     
     # Update task status
-    supabase.table("tasks")\
+    await supabase.table("tasks")\
         .update({
             "status": "completed",
-            "output": {"generated_files": list(code_result["files"].keys())},
+            "output": _pack_context({"generated_files": list(code_result["files"].keys())}),
             "completed_at": "now()"
         })\
         .eq("id", task_id)\
@@ -110,28 +158,13 @@ async def get_pending_changes(
     current_user: User = Depends(get_current_user)
 ):
     """Get pending code changes"""
-    supabase = get_supabase()
+    supabase = await get_supabase_async()
     
     # Verify project access
-    project_response = supabase.table("projects")\
-        .select("user_id")\
-        .eq("id", project_id)\
-        .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    if project_response.data[0]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    await verify_project_access(supabase, project_id, current_user.id)
     
     # Get pending changes (approved = null means pending)
-    changes_response = supabase.table("code_changes")\
+    changes_response = await supabase.table("code_changes")\
         .select("*, tasks!inner(project_id)")\
         .eq("tasks.project_id", project_id)\
         .is_("approved", "null")\
@@ -148,36 +181,24 @@ async def approve_change(
     current_user: User = Depends(get_current_user)
 ):
     """Approve a code change"""
-    supabase = get_supabase()
-    
-    # Verify change exists and belongs to user's project
-    change_response = supabase.table("code_changes")\
-        .select("*, tasks!inner(project_id, projects!inner(user_id))")\
-        .eq("id", change_id)\
-        .eq("tasks.project_id", project_id)\
-        .execute()
-    
-    if not change_response.data:
+    supabase = await get_supabase_async()
+
+    # Ownership check + update in a single round trip
+    response = await supabase.rpc("set_change_approval", {
+        "p_change_id": change_id,
+        "p_project_id": project_id,
+        "p_user_id": current_user.id,
+        "p_approved": True,
+    }).execute()
+
+    if not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Code change not found"
         )
-    
-    change = change_response.data[0]
-    if change["tasks"]["projects"]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    # Update change as approved
-    supabase.table("code_changes")\
-        .update({"approved": True})\
-        .eq("id", change_id)\
-        .execute()
-    
+
     # TODO: Apply the change to the actual codebase/sandbox
-    
+
     return {"message": "Change approved successfully"}
 
 
@@ -188,34 +209,22 @@ async def reject_change(
     current_user: User = Depends(get_current_user)
 ):
     """Reject a code change"""
-    supabase = get_supabase()
-    
-    # Verify change exists and belongs to user's project
-    change_response = supabase.table("code_changes")\
-        .select("*, tasks!inner(project_id, projects!inner(user_id))")\
-        .eq("id", change_id)\
-        .eq("tasks.project_id", project_id)\
-        .execute()
-    
-    if not change_response.data:
+    supabase = await get_supabase_async()
+
+    # Ownership check + update in a single round trip
+    response = await supabase.rpc("set_change_approval", {
+        "p_change_id": change_id,
+        "p_project_id": project_id,
+        "p_user_id": current_user.id,
+        "p_approved": False,
+    }).execute()
+
+    if not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Code change not found"
         )
-    
-    change = change_response.data[0]
-    if change["tasks"]["projects"]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    # Update change as rejected
-    supabase.table("code_changes")\
-        .update({"approved": False})\
-        .eq("id", change_id)\
-        .execute()
-    
+
     return {"message": "Change rejected successfully"}
 
 
@@ -227,28 +236,23 @@ async def request_modification(
     current_user: User = Depends(get_current_user)
 ):
     """Request modification to a code change"""
-    supabase = get_supabase()
-    
-    # Verify change exists and belongs to user's project
-    change_response = supabase.table("code_changes")\
-        .select("*, tasks!inner(project_id, projects!inner(user_id))")\
-        .eq("id", change_id)\
-        .eq("tasks.project_id", project_id)\
-        .execute()
-    
+    supabase = await get_supabase_async()
+
+    # Fetch the change with the ownership check folded into one round trip
+    change_response = await supabase.rpc("get_change_for_user", {
+        "p_change_id": change_id,
+        "p_project_id": project_id,
+        "p_user_id": current_user.id,
+    }).execute()
+
     if not change_response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Code change not found"
         )
-    
+
     change = change_response.data[0]
-    if change["tasks"]["projects"]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
+
     # Create new task for modification
     task_id = str(uuid.uuid4())
     task_data = {
@@ -257,17 +261,17 @@ async def request_modification(
         "agent_type": change["agent_type"],
         "description": f"Modify previous change: {modification.feedback}",
         "status": "pending",
-        "input_context": {
+        "input_context": _pack_context({
             "modification_request": modification.feedback,
             "original_change_id": change_id,
             "original_file": change["file_path"]
-        },
+        }),
     }
     
-    supabase.table("tasks").insert(task_data).execute()
+    await supabase.table("tasks").insert(task_data).execute()
     
     # Mark original change as rejected
-    supabase.table("code_changes")\
+    await supabase.table("code_changes")\
         .update({"approved": False})\
         .eq("id", change_id)\
         .execute()
@@ -285,31 +289,16 @@ async def get_sandbox(
 ):
     """Get sandbox information"""
     from app.services.sandbox_service import sandbox_service
-    
-    # Verify project access
-    project_response = supabase.table("projects")\
-        .select("user_id")\
-        .eq("id", project_id)\
-        .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    if project_response.data[0]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    sandbox = await sandbox_service.get_sandbox(project_id)
-    
-    if not sandbox:
-        # Create sandbox if it doesn't exist
-        sandbox = await sandbox_service.create_sandbox(project_id)
-    
+    supabase = await get_supabase_async()
+
+    # Overlap the access check with the sandbox read (both independent
+    # round trips); creation only happens after the check has passed
+    sandbox, _ = await asyncio.gather(
+        sandbox_service.get_sandbox(project_id),
+        verify_project_access(supabase, project_id, current_user.id),
+    )
+    if sandbox is None:
+        sandbox = await sandbox_service.get_or_create_sandbox(project_id)
     return sandbox
 
 
@@ -320,28 +309,21 @@ async def get_preview(
 ):
     """Get preview information"""
     from app.services.sandbox_service import sandbox_service
-    
-    # Verify project access
-    project_response = supabase.table("projects")\
-        .select("user_id")\
-        .eq("id", project_id)\
-        .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    if project_response.data[0]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    # Get preview info from sandbox service
-    preview_info = await sandbox_service.get_preview_info(project_id)
-    return preview_info
+    supabase = await get_supabase_async()
+
+    # Overlap the access check with the sandbox read; the create-if-absent
+    # path inside get_preview_info only runs once the check has passed
+    sandbox, _ = await asyncio.gather(
+        sandbox_service.get_sandbox(project_id),
+        verify_project_access(supabase, project_id, current_user.id),
+    )
+    if sandbox is not None:
+        return {
+            "status": sandbox["status"],
+            "preview_url": sandbox["preview_url"],
+            "qr_code": sandbox["qr_code"]
+        }
+    return await sandbox_service.get_preview_info(project_id)
 
 
 @router.post("/build")
@@ -352,24 +334,10 @@ async def create_build(
 ):
     """Create a build for deployment"""
     from app.services.deployment_service import deployment_service
-    
+    supabase = await get_supabase_async()
+
     # Verify project access
-    project_response = supabase.table("projects")\
-        .select("user_id")\
-        .eq("id", project_id)\
-        .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    if project_response.data[0]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    await verify_project_access(supabase, project_id, current_user.id)
     
     if platform not in ["ios", "android", "both"]:
         raise HTTPException(
@@ -410,14 +378,17 @@ async def get_deployment_guide(
 ):
     """Get deployment guide for platform"""
     from app.services.deployment_service import deployment_service
-    
-    guide = await deployment_service.get_deployment_guide(platform)
-    return guide
+
+    # Pre-serialized at import; hand the bytes straight to the client
+    return Response(
+        content=deployment_service.get_deployment_guide(platform),
+        media_type="application/json",
+    )
 
 
 async def process_modification_request(task_id: str, original_change: dict, feedback: str):
     """Process a modification request and create a new code change"""
-    supabase = get_supabase()
+    supabase = await get_supabase_async()
     
     # Generate modified code based on feedback
     change_id = str(uuid.uuid4())
@@ -439,10 +410,10 @@ async def process_modification_request(task_id: str, original_change: dict, feed
         "approved": None,  # Pending approval
     }
     
-    supabase.table("code_changes").insert(change_data).execute()
+    await supabase.table("code_changes").insert(change_data).execute()
     
     # Update task status
-    supabase.table("tasks")\
+    await supabase.table("tasks")\
         .update({
             "status": "completed",
             "output": {"modification_applied": True, "feedback": feedback},
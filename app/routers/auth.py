@@ -1,13 +1,18 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import timedelta
 from app.models import UserCreate, UserLogin, Token, User
 from app.auth import (
+    pwd_context,
+    user_adapter,
     get_password_hash,
     verify_password,
     create_access_token,
-    get_current_user
+    get_current_user,
+    invalidate_user_cache,
+    USER_COLUMNS
 )
-from app.database import get_supabase
+from app.database import get_supabase_async
 from app.config import settings
 import uuid
 
@@ -17,19 +22,19 @@ router = APIRouter()
 @router.post("/signup", response_model=Token)
 async def signup(user_data: UserCreate):
     """Register a new user"""
-    supabase = get_supabase()
+    supabase = await get_supabase_async()
     
     # Check if user already exists
-    existing = supabase.table("users").select("id").eq("email", user_data.email).execute()
+    existing = await supabase.table("users").select("id").eq("email", user_data.email).execute()
     if existing.data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create user
+    # Create user (hashing is CPU-bound; keep it off the event loop)
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
     
     new_user = {
         "id": user_id,
@@ -40,7 +45,7 @@ async def signup(user_data: UserCreate):
         "credits_remaining": 100,
     }
     
-    response = supabase.table("users").insert(new_user).execute()
+    response = await supabase.table("users").insert(new_user).execute()
     
     if not response.data:
         raise HTTPException(
@@ -54,7 +59,7 @@ async def signup(user_data: UserCreate):
         data={"sub": user_id}, expires_delta=access_token_expires
     )
     
-    user = User(**response.data[0])
+    user = user_adapter.validate_python(response.data[0])
     
     return Token(access_token=access_token, user=user)
 
@@ -62,10 +67,10 @@ async def signup(user_data: UserCreate):
 @router.post("/login", response_model=Token)
 async def login(credentials: UserLogin):
     """Login user"""
-    supabase = get_supabase()
+    supabase = await get_supabase_async()
     
     # Get user by email
-    response = supabase.table("users").select("*").eq("email", credentials.email).execute()
+    response = await supabase.table("users").select("*").eq("email", credentials.email).execute()
     
     if not response.data:
         raise HTTPException(
@@ -75,25 +80,49 @@ async def login(credentials: UserLogin):
     
     user_data = response.data[0]
     
-    # Verify password
-    if not verify_password(credentials.password, user_data["password_hash"]):
+    # Verify password (CPU-bound; keep it off the event loop)
+    password_ok = await asyncio.to_thread(
+        verify_password, credentials.password, user_data["password_hash"]
+    )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
-    
+
+    # Migrate legacy (bcrypt) hashes to the current scheme on successful login
+    if pwd_context.needs_update(user_data["password_hash"]):
+        new_hash = await asyncio.to_thread(get_password_hash, credentials.password)
+        await supabase.table("users")\
+            .update({"password_hash": new_hash})\
+            .eq("id", user_data["id"])\
+            .execute()
+
     # Create access token
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
         data={"sub": user_data["id"]}, expires_delta=access_token_expires
     )
     
-    user = User(**user_data)
+    user = user_adapter.validate_python(user_data)
     
     return Token(access_token=access_token, user=user)
 
 
 @router.get("/me", response_model=User)
-async def get_me(current_user: User = Depends(get_current_user)):
-    """Get current user info"""
+async def get_me(
+    refresh: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Get current user info
+
+    Served from the auth cache, so frontends can poll it as a cheap session
+    ping. Pass ?refresh=true to bust the cache and re-read the user row.
+    """
+    if refresh:
+        invalidate_user_cache(current_user.id)
+        supabase = await get_supabase_async()
+        response = await supabase.table("users").select(USER_COLUMNS).eq("id", current_user.id).execute()
+        if response.data:
+            return user_adapter.validate_python(response.data[0])
     return current_user
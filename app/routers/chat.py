@@ -1,13 +1,55 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import json
+import re
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from app.models import ChatMessage, ChatMessageResponse, User
-from app.auth import get_current_user
-from app.database import get_supabase
+from app.auth import get_current_user, ownership_cached, cache_ownership
+import asyncio
+from app.database import get_supabase_async
+from app.services.ai_service import ai_service
+from app.services.memory_service import memory_service
 import uuid
 
 router = APIRouter()
 
 
+async def _verify_project_access(supabase, project_id: str, user_id: str):
+    """Existence + ownership probe in one query; 404 vs 403 only on a miss"""
+    if ownership_cached(project_id, user_id):
+        return
+
+    # maybe_single() makes PostgREST return one object instead of a
+    # one-element array: smaller body, no list allocation. On zero rows
+    # postgrest 0.16 returns None instead of an empty response.
+    response = await supabase.table("projects")\
+        .select("id")\
+        .eq("id", project_id)\
+        .eq("user_id", user_id)\
+        .maybe_single()\
+        .execute()
+
+    if response is not None and response.data is not None:
+        cache_ownership(project_id, user_id)
+        return
+
+    exists = await supabase.table("projects")\
+        .select("id")\
+        .eq("id", project_id)\
+        .maybe_single()\
+        .execute()
+
+    if exists is None or exists.data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Access denied"
+    )
+
+
 @router.post("", response_model=ChatMessageResponse)
 async def send_message(
     project_id: str,
@@ -15,31 +57,23 @@ async def send_message(
     current_user: User = Depends(get_current_user)
 ):
     """Send a message to the AI assistant"""
-    supabase = get_supabase()
+    supabase = await get_supabase_async()
     
     # Verify project access
-    project_response = supabase.table("projects")\
-        .select("user_id")\
-        .eq("id", project_id)\
-        .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    if project_response.data[0]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
+    await _verify_project_access(supabase, project_id, current_user.id)
+
+    # If the message resolves to a purely-static canned reply, the project
+    # context is never read — skip the three context queries and the LLM
+    # call entirely and go straight to persisting the turn.
+    static_response = _STATIC_RESPONSES.get(_detect_intent(message.message.lower()))
+
+    context_task = None
+    if static_response is None:
+        # Kick off the context fetch now so its DB latency overlaps the
+        # memory write below; it is awaited right before the AI call needs it
+        context_task = asyncio.create_task(get_project_context(project_id))
+
     # Store user message
-    import uuid
-    from datetime import datetime
-    from app.services.memory_service import memory_service
-    
     user_message_id = str(uuid.uuid4())
     user_message_data = {
         "id": user_message_id,
@@ -49,29 +83,31 @@ async def send_message(
         "attachments": None,
     }
     
-    supabase.table("chat_messages").insert(user_message_data).execute()
-    
+    # The insert is deferred: both the user and assistant rows go to
+    # Supabase in one batched insert once the reply exists
+
     # Store in memory
     await memory_service.store_conversation(project_id, "user", message.message)
     
-    # Generate AI response with context using tier-based models
-    from app.services.ai_service import ai_service
-    
-    # Get project context for AI
-    project_info, recent_memory, spec_context = await get_project_context(project_id)
-    project_context = {
-        "project_info": project_info,
-        "recent_memory": recent_memory[:5],  # Last 5 memory items
-        "spec_context": spec_context
-    }
-    
-    ai_response = await ai_service.generate_response(
-        current_user, 
-        message.message, 
-        context=project_context,
-        system_prompt="You are an expert mobile app development assistant specializing in React Native and Expo.",
-        project_id=project_id
-    )
+    if static_response is not None:
+        ai_response = static_response
+    else:
+        # Generate AI response with context using tier-based models
+        # Collect the context prefetched above
+        project_info, recent_memory, spec_context = await context_task
+        project_context = {
+            "project_info": project_info,
+            "recent_memory": recent_memory[:5],  # Last 5 memory items
+            "spec_context": spec_context
+        }
+
+        ai_response = await ai_service.generate_response(
+            current_user,
+            message.message,
+            context=project_context,
+            system_prompt="You are an expert mobile app development assistant specializing in React Native and Expo.",
+            project_id=project_id
+        )
     
     # Store AI message
     ai_message_id = str(uuid.uuid4())
@@ -83,117 +119,239 @@ async def send_message(
         "attachments": None,
     }
     
-    ai_message_response = supabase.table("chat_messages").insert(ai_message_data).execute()
-    
-    # Store AI response in memory
-    await memory_service.store_conversation(project_id, "assistant", ai_response)
-    
-    return ChatMessageResponse(**ai_message_response.data[0])
+    # Write both chat rows in one batched insert (two REST trips -> one)
+    # and persist the assistant turn to memory concurrently
+    insert_response, _ = await asyncio.gather(
+        supabase.table("chat_messages").insert([user_message_data, ai_message_data]).execute(),
+        memory_service.store_conversation(project_id, "assistant", ai_response),
+    )
+
+    # The row carries created_at; the response model calls it timestamp
+    ai_row = insert_response.data[1]
+    return ChatMessageResponse(timestamp=ai_row.pop("created_at"), **ai_row)
+
+
+@router.post("/stream")
+async def stream_message(
+    project_id: str,
+    message: ChatMessage,
+    current_user: User = Depends(get_current_user)
+):
+    """Send a message and stream the AI reply as Server-Sent Events.
+
+    Tokens are flushed as `data: {"token": ...}` events as they arrive, so
+    the client sees first output at first-token latency instead of waiting
+    for the full completion. Both chat rows are persisted in one batched
+    insert after the stream closes.
+    """
+    supabase = await get_supabase_async()
+
+    # Verify project access
+    await _verify_project_access(supabase, project_id, current_user.id)
+
+    # Prefetch context while the user turn is written to memory
+    context_task = asyncio.create_task(get_project_context(project_id))
+
+    user_message_data = {
+        "id": str(uuid.uuid4()),
+        "project_id": project_id,
+        "role": "user",
+        "content": message.message,
+        "attachments": None,
+    }
+
+    await memory_service.store_conversation(project_id, "user", message.message)
+
+    async def event_generator():
+        project_info, recent_memory, spec_context = await context_task
+        project_context = {
+            "project_info": project_info,
+            "recent_memory": recent_memory[:5],
+            "spec_context": spec_context
+        }
+
+        chunks = []
+        async for token in ai_service.generate_response_stream(
+            current_user,
+            message.message,
+            context=project_context,
+            system_prompt="You are an expert mobile app development assistant specializing in React Native and Expo.",
+            project_id=project_id
+        ):
+            chunks.append(token)
+            yield f"data: {json.dumps({'token': token})}\n\n"
+
+        ai_response = "".join(chunks)
+        ai_message_data = {
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
+            "role": "assistant",
+            "content": ai_response,
+            "attachments": None,
+        }
+
+        # Persist both turns in one batched insert, after the stream is done
+        await asyncio.gather(
+            supabase.table("chat_messages").insert([user_message_data, ai_message_data]).execute(),
+            memory_service.store_conversation(project_id, "assistant", ai_response),
+        )
+
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
+# Only the columns ChatMessageResponse actually needs
+_HISTORY_COLUMNS = "id, role, content, attachments, created_at"
 
 
 @router.get("/history", response_model=List[ChatMessageResponse])
 async def get_chat_history(
     project_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="Return messages created before this timestamp"),
     current_user: User = Depends(get_current_user)
 ):
-    """Get chat history for a project"""
-    supabase = get_supabase()
-    
+    """Get chat history for a project, newest page first
+
+    Fetches at most `limit` messages descending by created_at and returns
+    them in chronological order; pass the oldest timestamp of the previous
+    page as `before` to page further back.
+    """
+    supabase = await get_supabase_async()
+
     # Verify project access
-    project_response = supabase.table("projects")\
-        .select("user_id")\
-        .eq("id", project_id)\
-        .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    if project_response.data[0]["user_id"] != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    # Get chat messages
-    messages_response = supabase.table("chat_messages")\
-        .select("*")\
+    await _verify_project_access(supabase, project_id, current_user.id)
+
+    # Get the most recent page of messages
+    query = supabase.table("chat_messages")\
+        .select(_HISTORY_COLUMNS)\
         .eq("project_id", project_id)\
-        .order("created_at", desc=False)\
-        .execute()
-    
-    return [ChatMessageResponse(**msg) for msg in messages_response.data]
+        .order("created_at", desc=True)\
+        .limit(limit)
+
+    if before:
+        query = query.lt("created_at", before)
+
+    messages_response = await query.execute()
+
+    return [
+        ChatMessageResponse(timestamp=msg.pop("created_at"), **msg)
+        for msg in reversed(messages_response.data)
+    ]
 
 
 async def get_project_context(project_id: str):
     """Get project context for AI"""
-    from app.services.memory_service import memory_service
-    
-    supabase = get_supabase()
-    
-    # Get project info
-    project = supabase.table("projects").select("name, description").eq("id", project_id).execute()
+    supabase = await get_supabase_async()
+
+    # The three context sources are independent; fetch them concurrently so
+    # wall time is max(latencies) rather than their sum
+    project, recent_memory, specs = await asyncio.gather(
+        supabase.table("projects").select("name, description").eq("id", project_id).execute(),
+        memory_service.get_project_memory(project_id),
+        supabase.table("spec_files").select("file_type, content").eq("project_id", project_id).execute(),
+    )
+
     project_info = project.data[0] if project.data else {}
-    
-    # Get recent memory for context
-    recent_memory = await memory_service.get_project_memory(project_id)
-    
-    # Get spec files for context
-    specs = supabase.table("spec_files").select("file_type, content").eq("project_id", project_id).execute()
     spec_context = {spec["file_type"]: spec["content"][:500] + "..." for spec in specs.data}
-    
+
     return project_info, recent_memory, spec_context
 
 
+# Intent keywords for the canned-response fallback, in priority order.
+# All keywords are compiled into a single alternation so each message is
+# scanned once (in C, by the regex engine) instead of once per keyword.
+_INTENT_KEYWORDS = {
+    "greeting": ("hello", "hi", "hey"),
+    "add_feature": ("add feature", "new feature"),
+    "fix_bug": ("fix bug", "error", "issue"),
+    "refactor": ("refactor", "improve"),
+    "explain": ("explain", "how does", "what is"),
+    "specs": ("specs", "specification"),
+    "deploy": ("deploy", "publish"),
+}
+
+_INTENT_PATTERN = re.compile(
+    "|".join(
+        re.escape(keyword)
+        for keywords in _INTENT_KEYWORDS.values()
+        for keyword in keywords
+    )
+)
+
+_KEYWORD_INTENT = {
+    keyword: intent
+    for intent, keywords in _INTENT_KEYWORDS.items()
+    for keyword in keywords
+}
+
+# Templates for the context-aware replies; the static literal bulk is
+# built once here and each call does a single C-level substitution
+_GREETING_TPL = "Hello! I'm your AI assistant for {project_name}. I can see you're working on a mobile app project. I can help you add features, fix bugs, refactor code, explain architecture, or generate new components. What would you like to work on?"
+
+_SPECS_TPL = "I can see your project has specification files. Here's what I found:\n\n• Design specs: {design}\n• Requirements: {requirements}\n• Tasks: {tasks}\n\nWould you like me to update any of these specs or generate code based on them?"
+
+_FALLBACK_TPL = "I understand you're asking about: '{message}'.{hint} I can help you with:\n\n• Adding new features\n• Fixing bugs and issues\n• Refactoring code\n• Explaining architecture\n• Updating specifications\n• Preparing for deployment\n\nCould you be more specific about what you'd like to do?"
+
+# Responses that need no project context at all
+_STATIC_RESPONSES = {
+    "add_feature": "I'd be happy to help you add a new feature to your app! Based on your project specs, I can generate the necessary code and update your specifications. What specific feature would you like to add? For example:\n\n• User authentication\n• Data storage\n• API integration\n• UI components\n• Navigation screens",
+    "fix_bug": "I can help you debug and fix issues in your code. Could you describe:\n\n• What error are you seeing?\n• Which part of the app is affected?\n• What were you trying to do when it happened?\n\nI'll analyze your code and suggest a fix!",
+    "refactor": "I can help refactor your code to make it cleaner and more maintainable. Which area would you like to improve?\n\n• Component structure\n• State management\n• Performance optimization\n• Code organization\n• Best practices implementation",
+    "explain": "I can explain any part of your app's architecture or code. What would you like me to explain?\n\n• Overall app structure\n• Specific components\n• Data flow\n• Navigation setup\n• API integration\n• State management",
+    "deploy": "I can help you prepare your app for deployment! Here's what we need to do:\n\n• Build the app for production\n• Generate app store assets\n• Configure app signing\n• Create store listings\n• Submit to App Store/Google Play\n\nWhich step would you like to start with?",
+}
+
+
+def _detect_intent(message_lower: str) -> Optional[str]:
+    """Match a lowercased message against the intent keywords in one scan"""
+    matched = {_KEYWORD_INTENT[kw] for kw in _INTENT_PATTERN.findall(message_lower)}
+    if not matched:
+        return None
+    # Preserve the priority order of the original if/elif cascade
+    for intent in _INTENT_KEYWORDS:
+        if intent in matched:
+            return intent
+    return None
+
+
 async def generate_ai_response(user_message: str, project_id: str) -> str:
     """Generate AI response with project context"""
-    from app.services.memory_service import memory_service
-    
-    # Get project context
-    supabase = get_supabase()
-    
-    # Get project info
-    project = supabase.table("projects").select("name, description").eq("id", project_id).execute()
+    # Get project context; the three fetches are independent
+    supabase = await get_supabase_async()
+
+    project, recent_memory, specs = await asyncio.gather(
+        supabase.table("projects").select("name, description").eq("id", project_id).execute(),
+        memory_service.get_project_memory(project_id),
+        supabase.table("spec_files").select("file_type, content").eq("project_id", project_id).execute(),
+    )
+
     project_info = project.data[0] if project.data else {}
-    
-    # Get recent memory for context
-    recent_memory = await memory_service.get_project_memory(project_id)
-    
-    # Get spec files for context
-    specs = supabase.table("spec_files").select("file_type, content").eq("project_id", project_id).execute()
     spec_context = {spec["file_type"]: spec["content"][:500] + "..." for spec in specs.data}
     
-    message_lower = user_message.lower()
-    
-    # Context-aware responses
-    if any(word in message_lower for word in ["hello", "hi", "hey"]):
-        project_name = project_info.get("name", "your project")
-        return f"Hello! I'm your AI assistant for {project_name}. I can see you're working on a mobile app project. I can help you add features, fix bugs, refactor code, explain architecture, or generate new components. What would you like to work on?"
-    
-    elif "add feature" in message_lower or "new feature" in message_lower:
-        return f"I'd be happy to help you add a new feature to your app! Based on your project specs, I can generate the necessary code and update your specifications. What specific feature would you like to add? For example:\n\n• User authentication\n• Data storage\n• API integration\n• UI components\n• Navigation screens"
-    
-    elif "fix bug" in message_lower or "error" in message_lower or "issue" in message_lower:
-        return "I can help you debug and fix issues in your code. Could you describe:\n\n• What error are you seeing?\n• Which part of the app is affected?\n• What were you trying to do when it happened?\n\nI'll analyze your code and suggest a fix!"
-    
-    elif "refactor" in message_lower or "improve" in message_lower:
-        return "I can help refactor your code to make it cleaner and more maintainable. Which area would you like to improve?\n\n• Component structure\n• State management\n• Performance optimization\n• Code organization\n• Best practices implementation"
-    
-    elif "explain" in message_lower or "how does" in message_lower or "what is" in message_lower:
-        return "I can explain any part of your app's architecture or code. What would you like me to explain?\n\n• Overall app structure\n• Specific components\n• Data flow\n• Navigation setup\n• API integration\n• State management"
-    
-    elif "specs" in message_lower or "specification" in message_lower:
-        return f"I can see your project has specification files. Here's what I found:\n\n• Design specs: {'✓' if 'design' in spec_context else '✗'}\n• Requirements: {'✓' if 'requirements' in spec_context else '✗'}\n• Tasks: {'✓' if 'tasks' in spec_context else '✗'}\n\nWould you like me to update any of these specs or generate code based on them?"
-    
-    elif "deploy" in message_lower or "publish" in message_lower:
-        return "I can help you prepare your app for deployment! Here's what we need to do:\n\n• Build the app for production\n• Generate app store assets\n• Configure app signing\n• Create store listings\n• Submit to App Store/Google Play\n\nWhich step would you like to start with?"
-    
-    else:
-        # Try to be helpful with context
-        context_hint = ""
-        if project_info.get("description"):
-            context_hint = f" I can see you're building {project_info['description']}."
-        
-        return f"I understand you're asking about: '{user_message}'.{context_hint} I can help you with:\n\n• Adding new features\n• Fixing bugs and issues\n• Refactoring code\n• Explaining architecture\n• Updating specifications\n• Preparing for deployment\n\nCould you be more specific about what you'd like to do?"
+    # Context-aware responses, dispatched on a single keyword scan
+    intent = _detect_intent(user_message.lower())
+
+    static_response = _STATIC_RESPONSES.get(intent)
+    if static_response is not None:
+        return static_response
+
+    if intent == "greeting":
+        return _GREETING_TPL.replace(
+            "{project_name}", project_info.get("name", "your project")
+        )
+
+    if intent == "specs":
+        return _SPECS_TPL.format(
+            design="✓" if "design" in spec_context else "✗",
+            requirements="✓" if "requirements" in spec_context else "✗",
+            tasks="✓" if "tasks" in spec_context else "✗",
+        )
+
+    # Try to be helpful with context
+    context_hint = ""
+    if project_info.get("description"):
+        context_hint = f" I can see you're building {project_info['description']}."
+
+    return _FALLBACK_TPL.format(message=user_message, hint=context_hint)
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import Dict, Any
 from app.models import FileUpdate, User
 from app.auth import get_current_user
@@ -6,14 +7,11 @@ from app.auth import get_current_user
 router = APIRouter()
 
 
-@router.get("", response_model=Dict[str, Any])
-async def get_project_files(
-    project_id: str,
-    current_user: User = Depends(get_current_user)
-):
-    """Get all project files"""
-    # Mock file structure for now - in production this would come from E2B sandbox
-    return {
+# Mock file structure for now - in production this would come from E2B
+# sandbox. Built once at import; the handler returns a reference instead of
+# reallocating the whole nested tree per request (read-only GET, no
+# mutation risk).
+_MOCK_FILETREE: Dict[str, Any] = {
         "App.js": {
             "type": "file",
             "content": """import React from 'react';
@@ -87,7 +85,20 @@ const styles = StyleSheet.create({
                 }
             }
         }
-    }
+}
+
+# Serialized once at import; the handler returns raw bytes and skips the
+# jsonable_encoder + json.dumps pass over the fixed tree entirely
+_MOCK_FILETREE_BYTES = orjson.dumps(_MOCK_FILETREE)
+
+
+@router.get("", response_model=None)
+async def get_project_files(
+    project_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get all project files"""
+    return Response(content=_MOCK_FILETREE_BYTES, media_type="application/json")
 
 
 @router.put("", response_model=Dict[str, str])
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from collections import defaultdict
+import orjson
+from fastapi import APIRouter, HTTPException, Response, status, Depends, Query
 from typing import List, Optional
 from app.models import MarketplaceComponent, ComponentIntegration, User
 from app.auth import get_current_user
@@ -6,6 +8,95 @@ from app.auth import get_current_user
 router = APIRouter()
 
 
+# Mock marketplace catalog, hoisted to module scope so the dicts are built
+# once at import instead of on every request. Search and detail previously
+# kept separate copies; this is the single merged source for both.
+_CATALOG = [
+    {
+        "id": "auth-template",
+        "name": "Authentication Template",
+        "description": "Complete authentication system with login, signup, and password reset",
+        "category": "Authentication",
+        "tags": ["auth", "login", "security"],
+        "preview_url": "https://example.com/preview/auth",
+        "spec_template": {
+            "requirements": "User authentication with email/password",
+            "design": "Modern login and signup screens",
+            "tasks": ["Implement login screen", "Add signup flow", "Create password reset"]
+        },
+        "code_template": {
+            "screens/LoginScreen.js": "// Login screen implementation",
+            "services/auth.js": "// Authentication service"
+        },
+        "dependencies": ["@react-native-async-storage/async-storage", "react-native-keychain"],
+        "downloads": 1250,
+        "rating": 4.8,
+        "created_at": "2024-01-01T00:00:00Z"
+    },
+    {
+        "id": "payment-module",
+        "name": "Payment Integration",
+        "description": "Stripe payment integration with card processing",
+        "category": "Payments",
+        "tags": ["stripe", "payments", "checkout"],
+        "preview_url": "https://example.com/preview/payments",
+        "spec_template": {
+            "requirements": "Payment processing with Stripe",
+            "design": "Payment forms and checkout flow",
+            "tasks": ["Setup Stripe", "Create payment forms", "Handle transactions"]
+        },
+        "code_template": {
+            "services/stripe.js": "// Stripe integration",
+            "screens/CheckoutScreen.js": "// Checkout screen"
+        },
+        "dependencies": ["@stripe/stripe-react-native"],
+        "downloads": 890,
+        "rating": 4.6,
+        "created_at": "2024-01-15T00:00:00Z"
+    },
+    {
+        "id": "navigation-stack",
+        "name": "Navigation Stack",
+        "description": "Pre-configured React Navigation with common patterns",
+        "category": "Navigation",
+        "tags": ["navigation", "routing", "screens"],
+        "preview_url": "https://example.com/preview/navigation",
+        "spec_template": {},
+        "code_template": {},
+        "dependencies": ["@react-navigation/native", "@react-navigation/stack"],
+        "downloads": 2100,
+        "rating": 4.9,
+        "created_at": "2024-01-10T00:00:00Z"
+    },
+]
+
+_CATALOG_BY_ID = {comp["id"]: comp for comp in _CATALOG}
+
+# Prebuilt search indexes: lowercasing and tokenizing happen once at import,
+# so a request only does dict lookups and set intersections.
+_NAME_DESC = [
+    (comp["name"] + " " + comp["description"]).lower() for comp in _CATALOG
+]
+
+_CATEGORY_INDEX = defaultdict(list)
+_TAG_INDEX = defaultdict(set)
+for _i, _comp in enumerate(_CATALOG):
+    _CATEGORY_INDEX[_comp["category"].lower()].append(_i)
+    for _tag in _comp["tags"]:
+        _TAG_INDEX[_tag.lower()].add(_i)
+
+# The catalog is immutable, so validate it into Pydantic models once at
+# import; handlers return the cached instances instead of re-parsing the
+# same dicts (datetime strings included) on every request.
+_COMPONENT_MODELS = [MarketplaceComponent(**comp) for comp in _CATALOG]
+_COMPONENT_BY_ID = {model.id: model for model in _COMPONENT_MODELS}
+
+# Detail responses serialized once at import; the handler returns raw bytes
+# and skips both response-model validation and the JSON encoder. Building
+# the models above already validated the payload shape.
+_COMPONENT_JSON = {comp["id"]: orjson.dumps(comp) for comp in _CATALOG}
+
+
 @router.get("/search", response_model=List[MarketplaceComponent])
 async def search_marketplace(
     query: Optional[str] = Query(None),
@@ -13,134 +104,35 @@ async def search_marketplace(
     tags: Optional[str] = Query(None)
 ):
     """Search marketplace components"""
-    # Mock marketplace components
-    all_components = [
-        {
-            "id": "auth-template",
-            "name": "Authentication Template",
-            "description": "Complete authentication system with login, signup, and password reset",
-            "category": "Authentication",
-            "tags": ["auth", "login", "security"],
-            "preview_url": "https://example.com/preview/auth",
-            "spec_template": {},
-            "code_template": {},
-            "dependencies": ["@react-native-async-storage/async-storage"],
-            "downloads": 1250,
-            "rating": 4.8,
-            "created_at": "2024-01-01T00:00:00Z"
-        },
-        {
-            "id": "payment-module",
-            "name": "Payment Integration",
-            "description": "Stripe payment integration with card processing",
-            "category": "Payments",
-            "tags": ["stripe", "payments", "checkout"],
-            "preview_url": "https://example.com/preview/payments",
-            "spec_template": {},
-            "code_template": {},
-            "dependencies": ["@stripe/stripe-react-native"],
-            "downloads": 890,
-            "rating": 4.6,
-            "created_at": "2024-01-15T00:00:00Z"
-        },
-        {
-            "id": "navigation-stack",
-            "name": "Navigation Stack",
-            "description": "Pre-configured React Navigation with common patterns",
-            "category": "Navigation",
-            "tags": ["navigation", "routing", "screens"],
-            "preview_url": "https://example.com/preview/navigation",
-            "spec_template": {},
-            "code_template": {},
-            "dependencies": ["@react-navigation/native", "@react-navigation/stack"],
-            "downloads": 2100,
-            "rating": 4.9,
-            "created_at": "2024-01-10T00:00:00Z"
-        }
-    ]
-    
-    # Filter components based on search criteria
-    filtered_components = all_components
-    
-    if query:
-        query_lower = query.lower()
-        filtered_components = [
-            comp for comp in filtered_components
-            if query_lower in comp["name"].lower() or query_lower in comp["description"].lower()
-        ]
-    
+    # Start from the narrowest prebuilt index, then filter the survivors
     if category:
-        filtered_components = [
-            comp for comp in filtered_components
-            if comp["category"].lower() == category.lower()
-        ]
-    
+        candidates = _CATEGORY_INDEX.get(category.lower(), [])
+    else:
+        candidates = range(len(_CATALOG))
+
     if tags:
         tag_list = [tag.strip().lower() for tag in tags.split(",")]
-        filtered_components = [
-            comp for comp in filtered_components
-            if any(tag in [t.lower() for t in comp["tags"]] for tag in tag_list)
-        ]
-    
-    return [MarketplaceComponent(**comp) for comp in filtered_components]
+        tagged = set().union(*(_TAG_INDEX.get(tag, set()) for tag in tag_list))
+        candidates = [i for i in candidates if i in tagged]
 
+    if query:
+        query_lower = query.lower()
+        candidates = [i for i in candidates if query_lower in _NAME_DESC[i]]
 
-@router.get("/components/{component_id}", response_model=MarketplaceComponent)
+    return [_COMPONENT_MODELS[i] for i in candidates]
+
+
+@router.get("/components/{component_id}", response_model=None)
 async def get_component(component_id: str):
     """Get a specific marketplace component"""
-    # Mock marketplace components
-    mock_components = {
-        "auth-template": {
-            "id": "auth-template",
-            "name": "Authentication Template",
-            "description": "Complete authentication system with login, signup, and password reset",
-            "category": "Authentication",
-            "tags": ["auth", "login", "security"],
-            "preview_url": "https://example.com/preview/auth",
-            "spec_template": {
-                "requirements": "User authentication with email/password",
-                "design": "Modern login and signup screens",
-                "tasks": ["Implement login screen", "Add signup flow", "Create password reset"]
-            },
-            "code_template": {
-                "screens/LoginScreen.js": "// Login screen implementation",
-                "services/auth.js": "// Authentication service"
-            },
-            "dependencies": ["@react-native-async-storage/async-storage", "react-native-keychain"],
-            "downloads": 1250,
-            "rating": 4.8,
-            "created_at": "2024-01-01T00:00:00Z"
-        },
-        "payment-module": {
-            "id": "payment-module",
-            "name": "Payment Integration",
-            "description": "Stripe payment integration with card processing",
-            "category": "Payments",
-            "tags": ["stripe", "payments", "checkout"],
-            "preview_url": "https://example.com/preview/payments",
-            "spec_template": {
-                "requirements": "Payment processing with Stripe",
-                "design": "Payment forms and checkout flow",
-                "tasks": ["Setup Stripe", "Create payment forms", "Handle transactions"]
-            },
-            "code_template": {
-                "services/stripe.js": "// Stripe integration",
-                "screens/CheckoutScreen.js": "// Checkout screen"
-            },
-            "dependencies": ["@stripe/stripe-react-native"],
-            "downloads": 890,
-            "rating": 4.6,
-            "created_at": "2024-01-15T00:00:00Z"
-        }
-    }
-    
-    if component_id not in mock_components:
+    body = _COMPONENT_JSON.get(component_id)
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Component not found"
         )
-    
-    return MarketplaceComponent(**mock_components[component_id])
+
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/projects/{project_id}/integrate")
@@ -1,25 +1,58 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List
 from app.models import Project, ProjectCreate, ProjectUpdate, User
-from app.auth import get_current_user, check_project_access, check_tier_limits
-from app.database import get_supabase
+from app.auth import get_current_user, check_tier_limits, invalidate_ownership_cache
+from app.database import get_supabase_async
+from app.services.project_service import project_service
+from app.routers.subscription import invalidate_project_count_cache
 import uuid
 
 router = APIRouter()
 
+# Explicit projection of the projects columns the API exposes; keeps the
+# payload stable if the table grows columns the client should not see
+PROJECT_COLUMNS = "id, user_id, name, description, status, tier, sandbox_id, created_at, updated_at"
 
-@router.get("", response_model=List[Project])
+
+async def _raise_missing_or_forbidden(supabase, project_id: str):
+    """Decide 404 vs 403 after an ownership-scoped query came back empty.
+
+    The hot path folds the ownership check into the working query; only on
+    a miss do we pay a second (cheap) existence probe to pick the status.
+    """
+    # maybe_single(): one object instead of a one-element array. On zero
+    # rows postgrest 0.16 returns None instead of an empty response.
+    exists = await supabase.table("projects")\
+        .select("id")\
+        .eq("id", project_id)\
+        .maybe_single()\
+        .execute()
+
+    if exists is None or exists.data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="You don't have access to this project"
+    )
+
+
+@router.get("", response_model=None)
 async def get_projects(current_user: User = Depends(get_current_user)):
     """Get all projects for the current user"""
-    supabase = get_supabase()
-    
-    response = supabase.table("projects")\
-        .select("*")\
+    supabase = await get_supabase_async()
+
+    response = await supabase.table("projects")\
+        .select(PROJECT_COLUMNS)\
         .eq("user_id", current_user.id)\
         .order("updated_at", desc=True)\
         .execute()
-    
-    return [Project(**project) for project in response.data]
+
+    # PostgREST rows are already JSON-shaped; hand them straight to the
+    # default ORJSONResponse instead of round-tripping through Pydantic
+    return response.data
 
 
 @router.get("/{project_id}", response_model=Project)
@@ -28,23 +61,20 @@ async def get_project(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific project"""
-    supabase = get_supabase()
-    
-    response = supabase.table("projects")\
-        .select("*")\
+    supabase = await get_supabase_async()
+
+    # Ownership folded into the fetch: one round trip on the happy path
+    response = await supabase.table("projects")\
+        .select(PROJECT_COLUMNS)\
         .eq("id", project_id)\
+        .eq("user_id", current_user.id)\
+        .maybe_single()\
         .execute()
-    
-    if not response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    project = response.data[0]
-    check_project_access(current_user, project["user_id"])
-    
-    return Project(**project)
+
+    if response is None or response.data is None:
+        await _raise_missing_or_forbidden(supabase, project_id)
+
+    return Project.model_construct(**response.data)
 
 
 @router.post("", response_model=Project, status_code=status.HTTP_201_CREATED)
@@ -53,26 +83,28 @@ async def create_project(
     current_user: User = Depends(get_current_user)
 ):
     """Create a new project"""
-    supabase = get_supabase()
+    supabase = await get_supabase_async()
     
-    # Check tier limits
-    projects_response = supabase.table("projects")\
-        .select("id")\
+    # Check tier limits with a HEAD count: Postgres counts the rows and no
+    # row data crosses the wire
+    projects_response = await supabase.table("projects")\
+        .select("id", count="exact", head=True)\
         .eq("user_id", current_user.id)\
         .execute()
-    
-    check_tier_limits(current_user, len(projects_response.data))
+
+    check_tier_limits(current_user, projects_response.count or 0)
     
     # Use service to create project
-    from app.services.project_service import project_service
     project_data_dict = await project_service.create_project(
-        current_user, 
-        project_data.name, 
+        current_user,
+        project_data.name,
         project_data.description,
         project_data.include_backend
     )
-    
-    return Project(**project_data_dict)
+
+    invalidate_project_count_cache(current_user.id)
+
+    return Project.model_construct(**project_data_dict)
 
 
 @router.put("/{project_id}", response_model=Project)
@@ -82,33 +114,37 @@ async def update_project(
     current_user: User = Depends(get_current_user)
 ):
     """Update a project"""
-    supabase = get_supabase()
-    
-    # Check project exists and user has access
-    project_response = supabase.table("projects")\
-        .select("*")\
-        .eq("id", project_id)\
-        .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    check_project_access(current_user, project_response.data[0]["user_id"])
-    
-    # Update project
-    update_data = project_data.dict(exclude_unset=True)
+    supabase = await get_supabase_async()
+
+    # model_dump is the pydantic v2 fast path; .dict() goes through the
+    # deprecated v1 shim
+    update_data = project_data.model_dump(exclude_unset=True)
     if not update_data:
-        return Project(**project_response.data[0])
-    
-    response = supabase.table("projects")\
+        # No fields to change; just return the current row (ownership-scoped)
+        response = await supabase.table("projects")\
+            .select(PROJECT_COLUMNS)\
+            .eq("id", project_id)\
+            .eq("user_id", current_user.id)\
+            .maybe_single()\
+            .execute()
+
+        if response is None or response.data is None:
+            await _raise_missing_or_forbidden(supabase, project_id)
+
+        return Project.model_construct(**response.data)
+
+    # Ownership folded into the update itself: one round trip on success
+    response = await supabase.table("projects")\
         .update(update_data)\
         .eq("id", project_id)\
+        .eq("user_id", current_user.id)\
         .execute()
-    
-    return Project(**response.data[0])
+
+    if not response.data:
+        await _raise_missing_or_forbidden(supabase, project_id)
+
+    invalidate_ownership_cache(project_id)
+    return Project.model_construct(**response.data[0])
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -117,23 +153,20 @@ async def delete_project(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a project"""
-    supabase = get_supabase()
-    
-    # Check project exists and user has access
-    project_response = supabase.table("projects")\
-        .select("user_id")\
+    supabase = await get_supabase_async()
+
+    # Ownership folded into the delete (cascade handles related records)
+    response = await supabase.table("projects")\
+        .delete()\
         .eq("id", project_id)\
+        .eq("user_id", current_user.id)\
         .execute()
-    
-    if not project_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    check_project_access(current_user, project_response.data[0]["user_id"])
-    
-    # Delete project (cascade will handle related records)
-    supabase.table("projects").delete().eq("id", project_id).execute()
-    
+
+    if not response.data:
+        await _raise_missing_or_forbidden(supabase, project_id)
+
+    invalidate_ownership_cache(project_id)
+
+    invalidate_project_count_cache(current_user.id)
+
     return None
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from app.models import SpecFile, SpecVersion, SpecFileUpdate, SpecRollback, User
+from app.models import SpecFile, SpecFileUpdate, SpecRollback, User
 from app.auth import get_current_user
-from app.database import get_supabase
+from app.database import get_supabase_async
 import uuid
 
 router = APIRouter()
 
+# Explicit projections for the spec tables
+SPEC_FILE_COLUMNS = "id, project_id, file_type, content, version, created_at, created_by"
+SPEC_VERSION_COLUMNS = "id, spec_file_id, version, content, changes_summary, created_at, created_by"
+
 
 @router.get("/{file_type}", response_model=SpecFile)
 async def get_spec_file(
@@ -15,23 +18,25 @@ async def get_spec_file(
     current_user: User = Depends(get_current_user)
 ):
     """Get a spec file"""
-    supabase = get_supabase()
-    
-    response = supabase.table("spec_files")\
-        .select("*")\
+    supabase = await get_supabase_async()
+
+    # (project_id, file_type) is unique (migration 006): a plain equality
+    # lookup, no ordering over versions needed
+    response = await supabase.table("spec_files")\
+        .select(SPEC_FILE_COLUMNS)\
         .eq("project_id", project_id)\
         .eq("file_type", file_type)\
-        .order("version", desc=True)\
-        .limit(1)\
+        .maybe_single()\
         .execute()
-    
-    if not response.data:
+
+    # postgrest 0.16 returns None outright when no row matches
+    if response is None or response.data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Spec file not found"
         )
-    
-    return SpecFile(**response.data[0])
+
+    return SpecFile.model_construct(**response.data)
 
 
 @router.put("/{file_type}", response_model=SpecFile)
@@ -42,83 +47,57 @@ async def update_spec_file(
     current_user: User = Depends(get_current_user)
 ):
     """Update a spec file (creates new version)"""
-    supabase = get_supabase()
-    
-    # Get current spec file
-    current_response = supabase.table("spec_files")\
-        .select("*")\
-        .eq("project_id", project_id)\
-        .eq("file_type", file_type)\
-        .order("version", desc=True)\
-        .limit(1)\
-        .execute()
-    
-    if not current_response.data:
+    supabase = await get_supabase_async()
+
+    # Snapshot-to-history and content update happen atomically server-side
+    # (migration 005): one round trip instead of select + insert + update
+    response = await supabase.rpc("bump_spec_version", {
+        "p_project_id": project_id,
+        "p_file_type": file_type,
+        "p_content": spec_data.content,
+        "p_user": current_user.id,
+        "p_summary": "Updated via editor",
+    }).execute()
+
+    if not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Spec file not found"
         )
-    
-    current_spec = current_response.data[0]
-    
-    # Save current version to history
-    import uuid
-    version_id = str(uuid.uuid4())
-    version_data = {
-        "id": version_id,
-        "spec_file_id": current_spec["id"],
-        "version": current_spec["version"],
-        "content": current_spec["content"],
-        "changes_summary": "Updated via editor",
-        "created_by": current_user.id,
-    }
-    supabase.table("spec_versions").insert(version_data).execute()
-    
-    # Update spec file with new content and increment version
-    new_version = current_spec["version"] + 1
-    update_data = {
-        "content": spec_data.content,
-        "version": new_version,
-    }
-    
-    response = supabase.table("spec_files")\
-        .update(update_data)\
-        .eq("id", current_spec["id"])\
-        .execute()
-    
-    return SpecFile(**response.data[0])
 
+    return SpecFile.model_construct(**response.data[0])
 
-@router.get("/{file_type}/versions", response_model=List[SpecVersion])
+
+@router.get("/{file_type}/versions", response_model=None)
 async def get_spec_versions(
     project_id: str,
     file_type: str,
     current_user: User = Depends(get_current_user)
 ):
     """Get version history for a spec file"""
-    supabase = get_supabase()
-    
-    # Get spec file id
-    spec_response = supabase.table("spec_files")\
+    supabase = await get_supabase_async()
+
+    # Get spec file id (unique per project_id + file_type)
+    spec_response = await supabase.table("spec_files")\
         .select("id")\
         .eq("project_id", project_id)\
         .eq("file_type", file_type)\
-        .limit(1)\
+        .maybe_single()\
         .execute()
-    
-    if not spec_response.data:
+
+    if spec_response is None or spec_response.data is None:
         return []
-    
-    spec_file_id = spec_response.data[0]["id"]
-    
-    # Get versions
-    versions_response = supabase.table("spec_versions")\
-        .select("*")\
+
+    spec_file_id = spec_response.data["id"]
+
+    # Get versions; rows go straight to the ORJSON response, no Pydantic pass
+    versions_response = await supabase.table("spec_versions")\
+        .select(SPEC_VERSION_COLUMNS)\
         .eq("spec_file_id", spec_file_id)\
         .order("version", desc=True)\
         .execute()
-    
-    return [SpecVersion(**version) for version in versions_response.data]
+
+    return versions_response.data
 
 
 @router.post("/{file_type}/rollback", response_model=SpecFile)
@@ -129,59 +108,19 @@ async def rollback_spec(
     current_user: User = Depends(get_current_user)
 ):
     """Rollback to a previous version"""
-    supabase = get_supabase()
-    
-    # Get the version to rollback to
-    version_response = supabase.table("spec_versions")\
-        .select("*")\
-        .eq("id", rollback_data.version_id)\
-        .execute()
-    
-    if not version_response.data:
+    supabase = await get_supabase_async()
+
+    # Snapshot current content and restore the target version in one
+    # atomic statement (migration 005)
+    response = await supabase.rpc("rollback_spec_version", {
+        "p_version_id": rollback_data.version_id,
+        "p_user": current_user.id,
+    }).execute()
+
+    if not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Version not found"
         )
-    
-    version = version_response.data[0]
-    
-    # Get current spec file
-    spec_response = supabase.table("spec_files")\
-        .select("*")\
-        .eq("id", version["spec_file_id"])\
-        .execute()
-    
-    if not spec_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Spec file not found"
-        )
-    
-    current_spec = spec_response.data[0]
-    
-    # Save current state to history before rollback
-    import uuid
-    history_id = str(uuid.uuid4())
-    history_data = {
-        "id": history_id,
-        "spec_file_id": current_spec["id"],
-        "version": current_spec["version"],
-        "content": current_spec["content"],
-        "changes_summary": f"Before rollback to version {version['version']}",
-        "created_by": current_user.id,
-    }
-    supabase.table("spec_versions").insert(history_data).execute()
-    
-    # Update spec file with rolled back content
-    new_version = current_spec["version"] + 1
-    update_data = {
-        "content": version["content"],
-        "version": new_version,
-    }
-    
-    response = supabase.table("spec_files")\
-        .update(update_data)\
-        .eq("id", current_spec["id"])\
-        .execute()
-    
-    return SpecFile(**response.data[0])
+
+    return SpecFile.model_construct(**response.data[0])
@@ -1,7 +1,11 @@
+import asyncio
+import uuid
+import orjson
 from fastapi import APIRouter, Depends
 from app.models import User
 from app.auth import get_current_user
-from app.database import get_supabase
+from app.config import settings
+from app.database import get_supabase_async, get_pg_pool
 
 router = APIRouter()
 
@@ -12,52 +16,45 @@ async def get_project_summary(
     current_user: User = Depends(get_current_user)
 ):
     """Get project summary with stats"""
-    supabase = get_supabase()
-    
-    # Get project info
-    project = supabase.table("projects")\
-        .select("*")\
-        .eq("id", project_id)\
-        .eq("user_id", current_user.id)\
-        .execute()
-    
+    if settings.database_url:
+        # Direct Postgres: project row and all counts in one query over the
+        # asyncpg pool, skipping PostgREST's HTTP and JSON layers
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT row_to_json(p) AS project, project_summary(p.id) AS stats"
+                " FROM projects p WHERE p.id = $1 AND p.user_id = $2",
+                uuid.UUID(project_id),
+                uuid.UUID(current_user.id),
+            )
+
+        if row is None:
+            return {"error": "Project not found"}
+
+        return {
+            "project": orjson.loads(row["project"]),
+            "stats": orjson.loads(row["stats"]),
+        }
+
+    supabase = await get_supabase_async()
+
+    # Two concurrent round trips: the project row, and one RPC in which
+    # Postgres computes all four counts server-side (migration 004)
+    project, stats = await asyncio.gather(
+        supabase.table("projects")
+        .select("id, user_id, name, description, status, tier, sandbox_id, created_at, updated_at")
+        .eq("id", project_id)
+        .eq("user_id", current_user.id)
+        .execute(),
+        supabase.rpc("project_summary", {"p_project_id": project_id}).execute(),
+    )
+
     if not project.data:
         return {"error": "Project not found"}
-    
-    # Get spec files count
-    specs = supabase.table("spec_files")\
-        .select("file_type", count="exact")\
-        .eq("project_id", project_id)\
-        .execute()
-    
-    # Get tasks count
-    tasks = supabase.table("tasks")\
-        .select("status", count="exact")\
-        .eq("project_id", project_id)\
-        .execute()
-    
-    # Get pending changes count
-    pending_changes = supabase.table("code_changes")\
-        .select("id", count="exact")\
-        .eq("tasks.project_id", project_id)\
-        .is_("approved", "null")\
-        .execute()
-    
-    # Get approved changes count
-    approved_changes = supabase.table("code_changes")\
-        .select("id", count="exact")\
-        .eq("tasks.project_id", project_id)\
-        .eq("approved", True)\
-        .execute()
-    
+
     return {
         "project": project.data[0],
-        "stats": {
-            "spec_files": specs.count or 0,
-            "total_tasks": tasks.count or 0,
-            "pending_changes": pending_changes.count or 0,
-            "approved_changes": approved_changes.count or 0,
-        }
+        "stats": stats.data,
     }
 
 
@@ -68,4 +65,4 @@ async def health_check():
         "status": "healthy",
         "service": "Spec-Driven AI App Builder API",
         "version": "1.0.0"
-    }
\ No newline at end of file
+    }
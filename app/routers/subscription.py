@@ -1,36 +1,43 @@
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, Depends
 from app.models import Subscription, SubscriptionUpgrade, User
-from app.auth import get_current_user
-from app.database import get_supabase
+from app.auth import get_current_user, TIER_LIMITS
+from app.database import get_supabase_async
 
 router = APIRouter()
 
+# Per-user project counts, cached briefly so bursts of subscription reads
+# don't re-count on every call. Invalidated when a project is created or
+# deleted; the TTL bounds staleness for any path that slips through.
+_project_count_cache = TTLCache(maxsize=10_000, ttl=30)
+
+
+def invalidate_project_count_cache(user_id: str):
+    """Drop a user's cached project count (call on project create/delete)"""
+    _project_count_cache.pop(user_id, None)
+
 
 @router.get("", response_model=Subscription)
 async def get_subscription(current_user: User = Depends(get_current_user)):
     """Get current subscription info"""
-    supabase = get_supabase()
-    
-    # Get projects count
-    projects_response = supabase.table("projects")\
-        .select("id")\
-        .eq("user_id", current_user.id)\
-        .execute()
-    
-    projects_count = len(projects_response.data)
-    
-    # Determine project limit based on tier
-    limits = {
-        "free": 1,
-        "pro": None,
-        "premium": None,
-    }
+    projects_count = _project_count_cache.get(current_user.id)
+    if projects_count is None:
+        supabase = await get_supabase_async()
+
+        # HEAD count: Postgres counts the rows, no ids cross the wire
+        projects_response = await supabase.table("projects")\
+            .select("id", count="exact", head=True)\
+            .eq("user_id", current_user.id)\
+            .execute()
+
+        projects_count = projects_response.count or 0
+        _project_count_cache[current_user.id] = projects_count
     
     return Subscription(
         tier=current_user.tier,
         credits_remaining=current_user.credits_remaining,
         projects_count=projects_count,
-        projects_limit=limits.get(current_user.tier)
+        projects_limit=TIER_LIMITS.get(current_user.tier)
     )
 
 
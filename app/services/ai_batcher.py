@@ -0,0 +1,108 @@
+"""
+Dynamic batching layer for LLM calls
+
+Collects concurrent chat completions over a short window and hands them to
+the backend as one batch, so prefill/weight-load cost is amortized across
+requests instead of paid per call. Callers submit work and await a future;
+a single consumer task drains the queue.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+# A runner takes the batched requests and returns one result per request,
+# in order. The default runner in ai_service fans out with asyncio.gather;
+# a vLLM/OpenAI batched-completions runner can be dropped in unchanged.
+BatchRunner = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class AsyncDynamicBatcher:
+    def __init__(
+        self,
+        runner: BatchRunner,
+        max_batch_size: int = settings.ai_max_batch_size,
+        batch_wait_timeout_s: float = settings.ai_batch_wait_timeout_s,
+    ):
+        self._runner = runner
+        self._max_batch_size = max_batch_size
+        self._batch_wait_timeout_s = batch_wait_timeout_s
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def submit(self, request: Any) -> Any:
+        """Enqueue one request and wait for its result"""
+        loop = asyncio.get_running_loop()
+        if self._consumer is None or self._consumer.done():
+            # Started lazily so the batcher can be built at import time,
+            # before any event loop exists
+            self._consumer = loop.create_task(self._consume())
+
+        future = loop.create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block for the first request, then keep the batch open for at
+            # most the wait window to pick up concurrent arrivals
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._batch_wait_timeout_s
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            requests = [request for request, _ in batch]
+            try:
+                results = await self._runner(requests)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+# (estimated output-token bound, max batch size) per bin. Batch sizes shrink
+# as expected length grows so the KV-cache footprint of a batch stays
+# roughly constant, and short canned-style replies are never stalled behind
+# a long completion sharing their batch.
+DEFAULT_LENGTH_BINS: Sequence[Tuple[int, int]] = ((128, 32), (512, 16), (2048, 8))
+
+
+class LengthBinnedBatcher:
+    """Route requests into per-length-bin batchers.
+
+    Each bin gets its own queue and consumer, so a batch only ever contains
+    requests of comparable expected output length.
+    """
+
+    def __init__(
+        self,
+        runner: BatchRunner,
+        estimator: Callable[[Any], int],
+        bins: Sequence[Tuple[int, int]] = DEFAULT_LENGTH_BINS,
+    ):
+        self._estimator = estimator
+        self._bounds = [bound for bound, _ in bins]
+        self._batchers = [
+            AsyncDynamicBatcher(runner, max_batch_size=batch_size)
+            for _, batch_size in bins
+        ]
+
+    async def submit(self, request: Any) -> Any:
+        estimate = self._estimator(request)
+        for bound, batcher in zip(self._bounds, self._batchers):
+            if estimate <= bound:
+                return await batcher.submit(request)
+        # Anything beyond the last bound shares the longest bin
+        return await self._batchers[-1].submit(request)
@@ -1,47 +1,178 @@
 """
 AI service using Agno framework for multi-agent orchestration
 """
+import asyncio
+from functools import cached_property
+from types import MappingProxyType
 from typing import Dict, Any, Optional, List
 from app.models import User
 from app.config import settings
+from app.services.ai_batcher import LengthBinnedBatcher
+from app.services.memory_service import memory_service
+from app.services.rate_limit import TokenBucket
+from app.services.response_cache import ResponseCache
 import os
 from agno import Agent, Workflow, Task
+from agno.memory import Memory
 from agno.models import OpenAI, Gemini
-import json
+import orjson
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _log_background_exc(task: asyncio.Task):
+    """Surface failures from fire-and-forget tasks instead of losing them"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background memory write failed: %s", task.exception())
+
+
+# Per-tier model constructor specs, frozen once at import. _model() reads
+# this instead of rebuilding config literals per call, and the proxy keeps
+# the shared table safely immutable across workers.
+_MODEL_SPECS = MappingProxyType({
+    "free": (OpenAI, {
+        "model": "deepseek-chat",
+        "api_key": settings.deepseek_api_key,
+        "base_url": "https://api.deepseek.com/v1",
+        "max_tokens": 2048,
+    }),
+    "pro": (Gemini, {
+        "model": "gemini-2.5",
+        "max_tokens": 4096,
+        "api_key": settings.google_api_key,
+    }),
+    "premium": (Gemini, {
+        "model": "gemini-2.5",
+        "max_tokens": 8192,
+        "api_key": settings.google_api_key,
+    }),
+})
+
+
+def _context_block(context: Optional[Dict]) -> str:
+    """Serialize project context for a prompt; empty string when absent.
+
+    orjson's compact dump is several times faster than json.dumps with
+    indent=2, and models don't need pretty-printing.
+    """
+    if not context:
+        return ""
+    return f"Project Context: {orjson.dumps(context).decode()}\n\n"
 
 
 class AIService:
     """Service for AI interactions using Agno framework"""
-    
+
+    # Prompt skeletons built once at class definition; methods fill them
+    # with str.format instead of re-concatenating f-string pieces per call
+    _DESIGN_TMPL = """{ctx}Task: {task}
+
+Create a React Native component that implements the requested functionality.
+Consider the user's tier ({tier}) when determining the complexity and features to include.
+
+For free tier: Create basic, functional components
+For pro tier: Add JavaScrip, animations, and advanced features
+For premium tier: Include comprehensive JavaScript, custom hooks, animations, and accessibility features
+
+Provide the component code and any necessary supporting files."""
+
+    _BACKEND_TMPL = """{ctx}Task: {task}
+
+Create backend code (API endpoints, database schemas, services) for the requested functionality.
+Use FastAPI and Supabase as the primary technologies.
+Consider the user's tier ({tier}) when determining features and complexity.
+
+Provide complete, production-ready code with proper error handling and documentation."""
+
+    _TESTING_TMPL = """{ctx}Task: {task}
+
+Create comprehensive test suites for the requested functionality.
+Include unit tests, integration tests, and any necessary mocking.
+Consider the user's tier ({tier}) when determining test coverage and complexity.
+
+Provide complete test files with proper setup, teardown, and assertions."""
+
     def __init__(self):
-        # Initialize Agno models based on tier
-        self.models = {
-            "free": OpenAI(
-                model="deepseek-chat",
-                api_key=settings.deepseek_api_key,
-                base_url="https://api.deepseek.com/v1",
-                max_tokens=2048
-            ),
-            "pro": Gemini(
-                model="gemini-2.5", 
-                max_tokens=4096,
-                api_key=settings.google_api_key
-            ),
-            "premium": Gemini(
-                model="gemini-2.5", 
-                max_tokens=8192,
-                api_key=settings.google_api_key
+        # Model clients and agent workflows are created lazily: the
+        # singleton is built at import time, and a worker that only ever
+        # serves free-tier chat shouldn't pay for Gemini clients or the
+        # design/backend/testing agents it never touches
+        self._models = {}
+        self._tasks = {}
+        self._workflows = {}
+
+        # Per-project Agno memory instances, created once and reused
+        self._agent_memories = {}
+
+        # Dynamic batching for chat completions (opt-in via settings),
+        # binned by predicted output length so short replies aren't
+        # stalled behind long completions in the same batch
+        self._batcher = LengthBinnedBatcher(
+            self._run_response_batch, self._estimate_output_tokens
+        )
+
+        # Exact-match response cache: repeated prompts short-circuit the
+        # upstream LLM call entirely (disabled when the TTL is <= 0)
+        self._response_cache = (
+            ResponseCache(settings.ai_cache_maxsize, settings.ai_cache_ttl_s)
+            if settings.ai_cache_ttl_s > 0
+            else None
+        )
+
+        # Single-flight: identical requests already being computed, keyed
+        # like the response cache, so bursts share one upstream call
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Per-provider request/token buckets; rates are per-minute in
+        # settings (matching how providers advertise them), 0 disables
+        self._rate_limits = {
+            provider: (
+                TokenBucket(rpm / 60, max(rpm / 60, 1)) if rpm > 0 else None,
+                TokenBucket(tpm / 60, tpm) if tpm > 0 else None,
+            )
+            for provider, rpm, tpm in (
+                ("gemini", settings.gemini_rpm, settings.gemini_tpm),
+                ("deepseek", settings.deepseek_rpm, settings.deepseek_tpm),
             )
         }
-        
-        # Initialize specialized agents
-        self._init_agents()
     
-    def _init_agents(self):
-        """Initialize Agno agents for different tasks"""
-        
+    def _model(self, tier: str):
+        """Get or create the LLM client for a tier.
+
+        Unknown tiers fall back to "free"; each client is constructed on
+        first use from the frozen _MODEL_SPECS table and cached so repeat
+        requests reuse its HTTP state.
+        """
+        if tier not in _MODEL_SPECS:
+            tier = "free"
+
+        model = self._models.get(tier)
+        if model is None:
+            model_cls, kwargs = _MODEL_SPECS[tier]
+            model = model_cls(**kwargs)
+            self._models[tier] = model
+        return model
+
+    async def _shape_rate(self, tier: str, prompt: str) -> None:
+        """Wait on the provider's local request/token buckets before an
+        LLM call. Estimated usage is the prompt at ~4 chars/token plus the
+        tier's full output budget."""
+        provider = "gemini" if tier in ("pro", "premium") else "deepseek"
+        rpm_bucket, tpm_bucket = self._rate_limits[provider]
+        if rpm_bucket is not None:
+            await rpm_bucket.acquire()
+        if tpm_bucket is not None:
+            spec = _MODEL_SPECS[tier if tier in _MODEL_SPECS else "free"][1]
+            await tpm_bucket.acquire(len(prompt) // 4 + spec["max_tokens"])
+
+    # Agents are cached properties: each is built the first time any code
+    # path needs it and reused afterwards
+
+    @cached_property
+    def design_agent(self):
         # Design Agent for UI/UX tasks
-        self.design_agent = Agent(
+        return Agent(
             name="DesignAgent",
             role="UI/UX Designer and React Native Developer",
             goal="Create beautiful, functional, and accessible React Native components",
@@ -50,11 +181,13 @@ class AIService:
             and React Native best practices. You create components that are both visually appealing and 
             highly functional.""",
             tools=[],
-            verbose=True
+            verbose=settings.ai_verbose
         )
-        
+
+    @cached_property
+    def backend_agent(self):
         # Backend Agent for API and database tasks
-        self.backend_agent = Agent(
+        return Agent(
             name="BackendAgent", 
             role="Backend Developer and API Architect",
             goal="Design and implement robust backend systems and APIs",
@@ -62,11 +195,13 @@ class AIService:
             and modern API design. You create scalable, secure, and well-documented backend systems 
             that integrate seamlessly with mobile applications.""",
             tools=[],
-            verbose=True
+            verbose=settings.ai_verbose
         )
-        
+
+    @cached_property
+    def testing_agent(self):
         # Testing Agent for quality assurance
-        self.testing_agent = Agent(
+        return Agent(
             name="TestingAgent",
             role="QA Engineer and Test Automation Specialist", 
             goal="Ensure code quality through comprehensive testing strategies",
@@ -74,11 +209,13 @@ class AIService:
             You create comprehensive test suites that catch bugs early and ensure code reliability. 
             You understand both unit testing and integration testing for mobile applications.""",
             tools=[],
-            verbose=True
+            verbose=settings.ai_verbose
         )
-        
+
+    @cached_property
+    def chat_agent(self):
         # Chat Agent for general assistance
-        self.chat_agent = Agent(
+        return Agent(
             name="ChatAgent",
             role="AI Development Assistant",
             goal="Provide helpful guidance and assistance for mobile app development",
@@ -86,8 +223,26 @@ class AIService:
             app development. You help developers understand their code, debug issues, and implement 
             new features. You communicate clearly and provide actionable advice.""",
             tools=[],
-            verbose=True
+            verbose=settings.ai_verbose
         )
+
+    def _run_workflow(self, name: str, description: str, expected_output: str):
+        """Run an agent's cached workflow with a fresh task description.
+
+        One reusable Task and Workflow per agent, built on first use; each
+        call swaps the description in place instead of rebuilding both
+        objects (and re-binding logging/model config) per request.
+        """
+        task = self._tasks.get(name)
+        if task is None:
+            agent = getattr(self, f"{name}_agent")
+            task = Task(description="", agent=agent, expected_output="")
+            self._tasks[name] = task
+            self._workflows[name] = Workflow(agents=[agent], tasks=[task], verbose=settings.ai_verbose)
+
+        task.description = description
+        task.expected_output = expected_output
+        return self._workflows[name].kickoff()
     
     async def generate_response(
         self, 
@@ -98,13 +253,90 @@ class AIService:
         project_id: Optional[str] = None
     ) -> str:
         """Generate AI response using Agno chat agent with memory"""
-        model = self.models.get(user.tier, self.models["free"])
+        # Project-scoped turns read evolving agent memory, so only
+        # memory-free requests are safe to serve from the cache
+        cache_key = None
+        future = None
+        if self._response_cache is not None and project_id is None:
+            cache_key = ResponseCache.key(user.tier, prompt, system_prompt, context)
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # Single-flight: if an identical request is already being
+            # computed, wait for its result instead of firing another
+            # upstream call
+            existing = self._inflight.get(cache_key)
+            if existing is not None:
+                return await existing
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[cache_key] = future
+
+        try:
+            if settings.enable_dynamic_batch:
+                # Queue behind the batcher so concurrent chat requests
+                # are drained and executed together
+                result = await self._batcher.submit(
+                    (user, prompt, context, system_prompt, project_id)
+                )
+            else:
+                result = await self._generate_response_direct(
+                    user, prompt, context, system_prompt, project_id
+                )
+        except BaseException as exc:
+            if future is not None:
+                self._inflight.pop(cache_key, None)
+                if not future.done():
+                    future.set_exception(exc)
+                    # Mark retrieved in case no follower is waiting
+                    future.exception()
+            raise
+
+        if cache_key is not None:
+            self._response_cache.put(cache_key, result)
+            self._inflight.pop(cache_key, None)
+            if not future.done():
+                future.set_result(result)
+        return result
+
+    @staticmethod
+    def _estimate_output_tokens(request: tuple) -> int:
+        """Rough output-length prediction used to pick a batching bin.
+
+        Longer, context-heavy prompts tend to draw longer completions;
+        short context-free messages usually get canned-length replies.
+        """
+        _, prompt, context, _, _ = request
+        estimate = max(64, len(prompt) // 3)
+        if context:
+            estimate *= 2
+        return estimate
+
+    async def _run_response_batch(self, requests: List[tuple]) -> List[str]:
+        """Execute one drained batch of chat requests.
+
+        Agno's Workflow API has no multi-prompt endpoint, so the batch fans
+        out concurrently; swapping this body for a backend batched-
+        completions call (vLLM, OpenAI batch) needs no caller changes.
+        """
+        return await asyncio.gather(
+            *(self._generate_response_direct(*request) for request in requests)
+        )
+
+    async def _generate_response_direct(
+        self,
+        user: User,
+        prompt: str,
+        context: Optional[Dict] = None,
+        system_prompt: Optional[str] = None,
+        project_id: Optional[str] = None
+    ) -> str:
+        model = self._model(user.tier)
         self.chat_agent.llm = model
         
         # Get relevant memory context if project_id is provided
         memory_context = ""
         if project_id:
-            from app.services.memory_service import memory_service
             memory_context = await memory_service.get_relevant_context(
                 project_id, prompt, context_type=None
             )
@@ -118,8 +350,7 @@ class AIService:
         
         # Add additional context
         if context:
-            context_str = f"Project Context: {json.dumps(context, indent=2)}\n\n"
-            full_prompt = context_str + full_prompt
+            full_prompt = _context_block(context) + full_prompt
         
         if system_prompt:
             full_prompt = f"System: {system_prompt}\n\nUser: {full_prompt}"
@@ -129,30 +360,54 @@ class AIService:
             # Configure agent to use Agno memory
             self.chat_agent.memory = self._get_agent_memory(project_id)
         
-        # Create and execute task
-        task = Task(
-            description=full_prompt,
-            agent=self.chat_agent,
-            expected_output="A helpful and detailed response to the user's question or request"
-        )
-        
-        # Create workflow and execute
-        workflow = Workflow(
-            agents=[self.chat_agent],
-            tasks=[task],
-            verbose=True
+        # Run the chat agent's cached workflow
+        await self._shape_rate(user.tier, full_prompt)
+        result = self._run_workflow(
+            "chat",
+            full_prompt,
+            "A helpful and detailed response to the user's question or request"
         )
         
-        result = workflow.kickoff()
-        
-        # Store the interaction in memory
+        # Store the interaction in memory in the background: the client
+        # doesn't need these writes to render the response. Both turns go
+        # through one bulk insert rather than a round trip each.
         if project_id:
-            from app.services.memory_service import memory_service
-            await memory_service.store_conversation(project_id, "user", prompt)
-            await memory_service.store_conversation(project_id, "assistant", result)
+            task = asyncio.create_task(
+                memory_service.store_conversations(
+                    project_id, [("user", prompt), ("assistant", result)]
+                )
+            )
+            task.add_done_callback(_log_background_exc)
         
         return result
     
+    async def generate_response_stream(
+        self,
+        user: User,
+        prompt: str,
+        context: Optional[Dict] = None,
+        system_prompt: Optional[str] = None,
+        project_id: Optional[str] = None,
+        chunk_size: int = 64
+    ):
+        """Stream an AI response as text chunks (async iterator).
+
+        Agno's Workflow API hands back the completion in one piece, so for
+        now this chunks the finished text; the async-iterator signature is
+        the seam where a token-level backend stream plugs in without
+        touching callers.
+        """
+        result = await self.generate_response(
+            user,
+            prompt,
+            context=context,
+            system_prompt=system_prompt,
+            project_id=project_id
+        )
+
+        for i in range(0, len(result), chunk_size):
+            yield result[i:i + chunk_size]
+
     async def generate_code(
         self, 
         user: User, 
@@ -161,23 +416,36 @@ class AIService:
         project_context: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """Generate code using appropriate Agno agent"""
-        model = self.models.get(user.tier, self.models["free"])
-        
+        cache_key = None
+        if self._response_cache is not None:
+            cache_key = ResponseCache.key(
+                "code", user.tier, agent_type, task_description, project_context
+            )
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        model = self._model(user.tier)
+
         # Select appropriate agent
         if agent_type == "design":
             agent = self.design_agent
             agent.llm = model
-            return await self._generate_design_code(task_description, project_context, user.tier)
+            result = await self._generate_design_code(task_description, project_context, user.tier)
         elif agent_type == "backend":
             agent = self.backend_agent
             agent.llm = model
-            return await self._generate_backend_code(task_description, project_context, user.tier)
+            result = await self._generate_backend_code(task_description, project_context, user.tier)
         elif agent_type == "testing":
             agent = self.testing_agent
             agent.llm = model
-            return await self._generate_testing_code(task_description, project_context, user.tier)
+            result = await self._generate_testing_code(task_description, project_context, user.tier)
         else:
             raise ValueError(f"Unknown agent type: {agent_type}")
+
+        if cache_key is not None:
+            self._response_cache.put(cache_key, result)
+        return result
     
     async def _generate_design_code(
         self, 
@@ -186,35 +454,16 @@ class AIService:
         user_tier: str
     ) -> Dict[str, Any]:
         """Generate React Native UI components using Design Agent"""
-        
-        context_str = ""
-        if project_context:
-            context_str = f"Project Context: {json.dumps(project_context, indent=2)}\n\n"
-        
-        prompt = f"""{context_str}Task: {task_description}
 
-Create a React Native component that implements the requested functionality. 
-Consider the user's tier ({user_tier}) when determining the complexity and features to include.
+        prompt = self._DESIGN_TMPL.format(
+            ctx=_context_block(project_context),
+            task=task_description,
+            tier=user_tier,
+        )
 
-For free tier: Create basic, functional components
-For pro tier: Add JavaScrip, animations, and advanced features
-For premium tier: Include comprehensive JavaScript, custom hooks, animations, and accessibility features
 
-Provide the component code and any necessary supporting files."""
-        
-        task = Task(
-            description=prompt,
-            agent=self.design_agent,
-            expected_output="React Native component code with proper styling and functionality"
-        )
-        
-        workflow = Workflow(
-            agents=[self.design_agent],
-            tasks=[task],
-            verbose=True
-        )
-        
-        result = workflow.kickoff()
+        await self._shape_rate(user_tier, prompt)
+        result = self._run_workflow("design", prompt, "React Native component code with proper styling and functionality")
         
         # Parse the result and format as expected
         return {
@@ -231,32 +480,16 @@ Provide the component code and any necessary supporting files."""
         user_tier: str
     ) -> Dict[str, Any]:
         """Generate backend code using Backend Agent"""
-        
-        context_str = ""
-        if project_context:
-            context_str = f"Project Context: {json.dumps(project_context, indent=2)}\n\n"
-        
-        prompt = f"""{context_str}Task: {task_description}
-
-Create backend code (API endpoints, database schemas, services) for the requested functionality.
-Use FastAPI and Supabase as the primary technologies.
-Consider the user's tier ({user_tier}) when determining features and complexity.
 
-Provide complete, production-ready code with proper error handling and documentation."""
-        
-        task = Task(
-            description=prompt,
-            agent=self.backend_agent,
-            expected_output="Backend code including API endpoints and database schemas"
-        )
-        
-        workflow = Workflow(
-            agents=[self.backend_agent],
-            tasks=[task],
-            verbose=True
+        prompt = self._BACKEND_TMPL.format(
+            ctx=_context_block(project_context),
+            task=task_description,
+            tier=user_tier,
         )
-        
-        result = workflow.kickoff()
+
+
+        await self._shape_rate(user_tier, prompt)
+        result = self._run_workflow("backend", prompt, "Backend code including API endpoints and database schemas")
         
         return {
             "files": {
@@ -272,32 +505,16 @@ Provide complete, production-ready code with proper error handling and documenta
         user_tier: str
     ) -> Dict[str, Any]:
         """Generate test code using Testing Agent"""
-        
-        context_str = ""
-        if project_context:
-            context_str = f"Project Context: {json.dumps(project_context, indent=2)}\n\n"
-        
-        prompt = f"""{context_str}Task: {task_description}
 
-Create comprehensive test suites for the requested functionality.
-Include unit tests, integration tests, and any necessary mocking.
-Consider the user's tier ({user_tier}) when determining test coverage and complexity.
-
-Provide complete test files with proper setup, teardown, and assertions."""
-        
-        task = Task(
-            description=prompt,
-            agent=self.testing_agent,
-            expected_output="Comprehensive test suite with unit and integration tests"
-        )
-        
-        workflow = Workflow(
-            agents=[self.testing_agent],
-            tasks=[task],
-            verbose=True
+        prompt = self._TESTING_TMPL.format(
+            ctx=_context_block(project_context),
+            task=task_description,
+            tier=user_tier,
         )
-        
-        result = workflow.kickoff()
+
+
+        await self._shape_rate(user_tier, prompt)
+        result = self._run_workflow("testing", prompt, "Comprehensive test suite with unit and integration tests")
         
         return {
             "files": {
@@ -313,21 +530,26 @@ Provide complete test files with proper setup, teardown, and assertions."""
         project_context: Optional[Dict] = None
     ) -> List[Dict[str, Any]]:
         """Coordinate multiple agents working on related tasks"""
-        model = self.models.get(user.tier, self.models["free"])
+        model = self._model(user.tier)
         
         # Set model for all agents
         self.design_agent.llm = model
         self.backend_agent.llm = model
         self.testing_agent.llm = model
         
-        # Create tasks for each agent
+        # Create tasks for each agent, remembering the request each task
+        # came from so results stay aligned when unknown types are skipped
         agno_tasks = []
         agents_used = []
-        
+        kept_tasks = []
+
+        # Serialize the shared context once, not once per task
+        context_str = _context_block(project_context)
+
         for task_data in tasks:
             agent_type = task_data.get("agent_type")
             description = task_data.get("description")
-            
+
             if agent_type == "design":
                 agent = self.design_agent
             elif agent_type == "backend":
@@ -336,55 +558,80 @@ Provide complete test files with proper setup, teardown, and assertions."""
                 agent = self.testing_agent
             else:
                 continue
-            
-            context_str = ""
-            if project_context:
-                context_str = f"Project Context: {json.dumps(project_context, indent=2)}\n\n"
-            
+
             task = Task(
                 description=f"{context_str}{description}",
                 agent=agent,
                 expected_output=f"Code implementation for {agent_type} task"
             )
-            
+
             agno_tasks.append(task)
             agents_used.append(agent)
-        
-        # Create coordinated workflow
-        if agno_tasks:
+            kept_tasks.append(task_data)
+
+        if not agno_tasks:
+            return []
+
+        independent = all(
+            task_data.get("depends_on") is None for task_data in kept_tasks
+        )
+
+        # Shape toward provider ceilings before dispatching: one
+        # request token and one output budget per task
+        for task in agno_tasks:
+            await self._shape_rate(user.tier, task.description)
+
+        if independent and len(agno_tasks) > 1:
+            # Independent tasks: one single-task workflow per agent, run
+            # concurrently; wall time is the slowest LLM call, not the sum
+            workflows = [
+                Workflow(agents=[agent], tasks=[task], verbose=settings.ai_verbose)
+                for agent, task in zip(agents_used, agno_tasks)
+            ]
+            results = await asyncio.gather(
+                *(asyncio.to_thread(workflow.kickoff) for workflow in workflows)
+            )
+        else:
+            # Dependencies present (or a single task): keep the combined
+            # sequential workflow
             workflow = Workflow(
                 agents=agents_used,
                 tasks=agno_tasks,
-                verbose=True
+                verbose=settings.ai_verbose
             )
-            
             results = workflow.kickoff()
-            
-            # Format results
-            formatted_results = []
-            for i, result in enumerate(results if isinstance(results, list) else [results]):
-                formatted_results.append({
-                    "agent_type": tasks[i].get("agent_type"),
-                    "files": {f"generated_{i}.js": result},
-                    "reasoning": f"Generated by Agno {tasks[i].get('agent_type')} agent"
-                })
-            
-            return formatted_results
-        
-        return []
+            if not isinstance(results, list):
+                results = [results]
+
+        # Format results
+        formatted_results = []
+        for i, (task_data, result) in enumerate(zip(kept_tasks, results)):
+            formatted_results.append({
+                "agent_type": task_data.get("agent_type"),
+                "files": {f"generated_{i}.js": result},
+                "reasoning": f"Generated by Agno {task_data.get('agent_type')} agent"
+            })
+
+        return formatted_results
     
     def _get_agent_memory(self, project_id: str):
-        """Get Agno memory instance for an agent"""
-        from agno.memory import Memory
-        
-        # Return project-specific memory instance
-        return Memory(
-            memory_id=f"agent_{project_id}",
-            storage_backend="supabase",
-            embedding_model="text-embedding-ada-002",
-            max_memory_items=500,
-            similarity_threshold=0.7
-        )
+        """Get or create the Agno memory instance for a project's agent.
+
+        Memory objects hold storage/embedding client handles and internal
+        caches; reusing them keeps that state warm instead of rebuilding it
+        on every chat turn.
+        """
+        memory = self._agent_memories.get(project_id)
+        if memory is None:
+            memory = Memory(
+                memory_id=f"agent_{project_id}",
+                storage_backend="supabase",
+                embedding_model="text-embedding-ada-002",
+                max_memory_items=500,
+                similarity_threshold=0.7
+            )
+            self._agent_memories[project_id] = memory
+        return memory
 
 
 # Singleton instance
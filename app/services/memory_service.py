@@ -1,36 +1,127 @@
 """
 Project memory service using Agno framework's memory capabilities
 """
+import asyncio
+from collections import OrderedDict, defaultdict
 from typing import List, Dict, Any, Optional
+import hashlib
+import logging
+import orjson
+from cachetools import LRUCache, TTLCache
 from agno.memory import Memory, MemoryItem
-from app.database import get_supabase
+from app.config import settings
+from app.database import get_pg_pool, get_supabase_async
 import uuid
-import json
+
+logger = logging.getLogger(__name__)
+
+
+# Each Memory holds up to 1000 items plus an embedding index, so an
+# unbounded map leaks steadily on a long-lived worker; cap the working
+# set and evict the least recently used project
+_MAX_ACTIVE_PROJECTS = 64
 
 
 class MemoryService:
     """Service for managing project memory using Agno framework"""
     
     def __init__(self):
-        self.supabase = get_supabase()
-        # Initialize Agno memory instances per project
-        self._project_memories = {}
+        # Per-project Agno memory instances, LRU-ordered (oldest first)
+        self._project_memories = OrderedDict()
+        # Retrieval results for repeated queries. Keys embed a per-project
+        # generation counter, so storing new items invalidates a project's
+        # cached results in O(1) without scanning the cache.
+        self._search_cache = TTLCache(maxsize=1024, ttl=300)
+        self._memory_gen = defaultdict(int)
+        # Digests of recently stored content per project; exact repeats
+        # (e.g. strings of identical "OK" turns) are dropped instead of
+        # inflating the index and slowing every later search
+        self._recent_digests = LRUCache(maxsize=4096)
+        # Background persistence: rows are queued and a lazily started
+        # drain task coalesces them into batched inserts off the
+        # request path
+        self._write_queue = None
+        self._writer_task = None
     
+    def _enqueue_rows(self, rows: List[Dict]):
+        """Queue rows for the background writer, starting it lazily.
+
+        Callers only need the in-process Agno memory to reflect the
+        write; the Supabase row lands moments later without holding the
+        request open. The generation bump happens here so cached
+        retrieval results go stale as soon as the write is accepted.
+        """
+        if self._write_queue is None:
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._drain_writes())
+
+        for row in rows:
+            self._memory_gen[row["project_id"]] += 1
+            self._write_queue.put_nowait(row)
+
+    async def _drain_writes(self, max_batch: int = 100, max_wait_s: float = 0.05):
+        """Coalesce queued memory rows into batched inserts"""
+        loop = asyncio.get_running_loop()
+        while True:
+            rows = [await self._write_queue.get()]
+            deadline = loop.time() + max_wait_s
+            while len(rows) < max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(
+                        await asyncio.wait_for(self._write_queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._persist_rows(rows)
+            except Exception:
+                logger.warning("Background memory persistence failed", exc_info=True)
+
+    def _seen_recently(self, project_id: str, content: str) -> bool:
+        """True if identical content was just stored for this project.
+
+        blake2b over the content is cheap exact-duplicate detection; a
+        semantic near-duplicate check would need embedding access Agno
+        does not expose here.
+        """
+        key = (project_id, hashlib.blake2b(content.encode(), digest_size=16).digest())
+        if key in self._recent_digests:
+            return True
+        self._recent_digests[key] = True
+        return False
+
     def _get_project_memory(self, project_id: str) -> Memory:
         """Get or create Agno Memory instance for a project"""
-        if project_id not in self._project_memories:
-            # Initialize Agno Memory with project-specific configuration
-            self._project_memories[project_id] = Memory(
-                memory_id=f"project_{project_id}",
-                storage_backend="supabase",  # Use Supabase as storage backend
-                embedding_model="text-embedding-ada-002",  # For semantic search
-                max_memory_items=1000,  # Limit memory items per project
-                similarity_threshold=0.7
-            )
-        return self._project_memories[project_id]
+        memory = self._project_memories.get(project_id)
+        if memory is not None:
+            self._project_memories.move_to_end(project_id)
+            return memory
+
+        # Initialize Agno Memory with project-specific configuration
+        memory = Memory(
+            memory_id=f"project_{project_id}",
+            storage_backend="supabase",  # Use Supabase as storage backend
+            embedding_model="text-embedding-ada-002",  # For semantic search
+            max_memory_items=1000,  # Limit memory items per project
+            similarity_threshold=0.7
+        )
+        self._project_memories[project_id] = memory
+
+        # Dropping a cold instance is safe: every item is persisted to
+        # memory_items and load_project_memory_from_supabase rebuilds it
+        if len(self._project_memories) > _MAX_ACTIVE_PROJECTS:
+            self._project_memories.popitem(last=False)
+        return memory
     
     async def store_conversation(self, project_id: str, role: str, content: str, metadata: Dict = None):
         """Store a conversation message using Agno Memory"""
+        if self._seen_recently(project_id, content):
+            return
+
         memory = self._get_project_memory(project_id)
         
         # Create memory item with Agno
@@ -54,11 +145,47 @@ class MemoryService:
             **(metadata or {})
         })
     
+    async def store_conversations(self, project_id: str, entries: List[tuple]):
+        """Store several conversation turns with one Supabase insert.
+
+        entries is a list of (role, content) pairs. Agno memory items are
+        still added individually, but the persistence layer gets a single
+        bulk insert instead of one round trip per turn.
+        """
+        memory = self._get_project_memory(project_id)
+
+        rows = []
+        for role, content in entries:
+            if self._seen_recently(project_id, content):
+                continue
+            memory_item = MemoryItem(
+                content=content,
+                metadata={
+                    "type": "conversation",
+                    "role": role,
+                    "project_id": project_id,
+                },
+                importance_score=0.8 if role == "assistant" else 0.6
+            )
+            await memory.add(memory_item)
+
+            rows.append({
+                "project_id": project_id,
+                "item_type": "conversation",
+                "content": content,
+                "metadata": {"role": role},
+            })
+
+        if rows:
+            self._enqueue_rows(rows)
+
     async def store_decision(self, project_id: str, decision: str, rationale: str, components: List[str]):
         """Store a coding decision using Agno Memory"""
         memory = self._get_project_memory(project_id)
         
         content = f"Decision: {decision}\nRationale: {rationale}\nAffected Components: {', '.join(components)}"
+        if self._seen_recently(project_id, content):
+            return
         
         memory_item = MemoryItem(
             content=content,
@@ -86,6 +213,8 @@ class MemoryService:
         memory = self._get_project_memory(project_id)
         
         content = f"Pattern: {pattern_name}\nCode: {pattern_code}\nContext: {usage_context}"
+        if self._seen_recently(project_id, content):
+            return
         
         memory_item = MemoryItem(
             content=content,
@@ -111,6 +240,8 @@ class MemoryService:
         memory = self._get_project_memory(project_id)
         
         content = f"Preference: {key} = {value}"
+        if self._seen_recently(project_id, content):
+            return
         
         memory_item = MemoryItem(
             content=content,
@@ -159,6 +290,11 @@ class MemoryService:
     
     async def search_memory(self, project_id: str, query: str, limit: int = 10) -> List[Dict]:
         """Search memory items using Agno's semantic search"""
+        cache_key = ("search", project_id, self._memory_gen[project_id], query, limit)
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         memory = self._get_project_memory(project_id)
         
         # Use Agno's semantic search
@@ -169,7 +305,7 @@ class MemoryService:
         )
         
         # Convert to dict format
-        return [
+        results = [
             {
                 "id": mem.id,
                 "content": mem.content,
@@ -180,9 +316,16 @@ class MemoryService:
             }
             for mem in search_results
         ]
+        self._search_cache[cache_key] = results
+        return results
     
     async def get_relevant_context(self, project_id: str, query: str, context_type: Optional[str] = None) -> str:
         """Get relevant context for AI agents using Agno Memory"""
+        cache_key = ("context", project_id, self._memory_gen[project_id], query, context_type)
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         memory = self._get_project_memory(project_id)
         
         # Search for relevant memories
@@ -204,45 +347,94 @@ class MemoryService:
         for mem in relevant_memories:
             context_parts.append(f"[{mem.metadata.get('type', 'memory').upper()}] {mem.content}")
         
-        return "\n\n".join(context_parts) if context_parts else ""
+        context = "\n\n".join(context_parts) if context_parts else ""
+        self._search_cache[cache_key] = context
+        return context
     
     async def _store_in_supabase(self, project_id: str, item_type: str, content: str, metadata: Dict):
         """Store memory item in Supabase for persistence"""
-        memory_id = str(uuid.uuid4())
-        
-        memory_data = {
-            "id": memory_id,
+        self._enqueue_rows([{
             "project_id": project_id,
             "item_type": item_type,
             "content": content,
             "metadata": metadata
-        }
-        
-        self.supabase.table("memory_items").insert(memory_data).execute()
+        }])
+
+    async def _persist_rows(self, rows: List[Dict]):
+        """Persist memory rows, preferring the direct asyncpg pool.
+
+        With database_url configured the insert goes over the pooled
+        binary protocol — no HTTP, TLS, or PostgREST layer per write;
+        otherwise it falls back to one bulk PostgREST insert.
+        """
+        if settings.database_url:
+            pool = await get_pg_pool()
+            # No client-side id: the column default generates it, saving a
+            # CSPRNG read per row and keeping the payload smaller
+            await pool.executemany(
+                "INSERT INTO memory_items (project_id, item_type, content, metadata)"
+                " VALUES ($1, $2, $3, $4::jsonb)",
+                [
+                    (
+                        uuid.UUID(row["project_id"]),
+                        row["item_type"],
+                        row["content"],
+                        orjson.dumps(row["metadata"]).decode(),
+                    )
+                    for row in rows
+                ],
+            )
+            return
+
+        supabase = await get_supabase_async()
+        await supabase.table("memory_items").insert(rows).execute()
     
-    async def load_project_memory_from_supabase(self, project_id: str):
-        """Load existing memory items from Supabase into Agno Memory"""
+    async def load_project_memory_from_supabase(self, project_id: str, page_size: int = 500):
+        """Load existing memory items from Supabase into Agno Memory.
+
+        Rows are fetched in pages to bound peak memory on large projects,
+        and each page's items are added concurrently instead of one
+        awaited add per row.
+        """
         memory = self._get_project_memory(project_id)
-        
-        # Get existing memory items from Supabase
-        response = self.supabase.table("memory_items")\
-            .select("*")\
-            .eq("project_id", project_id)\
-            .order("created_at", desc=False)\
-            .execute()
-        
-        # Load into Agno Memory
-        for item in response.data:
-            memory_item = MemoryItem(
-                content=item["content"],
-                metadata={
-                    **item["metadata"],
-                    "type": item["item_type"],
-                    "project_id": project_id
-                },
-                importance_score=0.7  # Default importance
-            )
-            await memory.add(memory_item)
+        supabase = await get_supabase_async()
+
+        def fetch_page(offset: int):
+            return supabase.table("memory_items")\
+                .select("*")\
+                .eq("project_id", project_id)\
+                .order("created_at", desc=False)\
+                .range(offset, offset + page_size - 1)\
+                .execute()
+
+        offset = 0
+        next_page = asyncio.create_task(fetch_page(offset))
+        while next_page is not None:
+            response = await next_page
+            items = response.data
+            if not items:
+                break
+
+            # Prefetch the following page so its network wait overlaps
+            # this page's memory.add work
+            if len(items) == page_size:
+                offset += page_size
+                next_page = asyncio.create_task(fetch_page(offset))
+            else:
+                next_page = None
+
+            await asyncio.gather(*(
+                memory.add(MemoryItem(
+                    content=item["content"],
+                    metadata={
+                        **item["metadata"],
+                        "type": item["item_type"],
+                        "project_id": project_id
+                    },
+                    importance_score=0.7  # Default importance
+                ))
+                for item in items
+            ))
     
     async def clear_project_memory(self, project_id: str):
         """Clear all memory for a project"""
@@ -252,7 +444,8 @@ class MemoryService:
             del self._project_memories[project_id]
         
         # Also clear from Supabase
-        self.supabase.table("memory_items")\
+        supabase = await get_supabase_async()
+        await supabase.table("memory_items")\
             .delete()\
             .eq("project_id", project_id)\
             .execute()
@@ -1,108 +1,19 @@
 """
 Project-related business logic
 """
+import asyncio
 from typing import List, Optional
-from app.database import get_supabase
+from cachetools import TTLCache
+from app.database import get_supabase_async
 from app.models import Project, User
+from app.services.spec_generator import spec_generator
+from app.services.supabase_generator import supabase_generator
 import uuid
 
 
-class ProjectService:
-    def __init__(self):
-        self.supabase = get_supabase()
-    
-    async def get_user_projects(self, user_id: str) -> List[dict]:
-        """Get all projects for a user"""
-        response = self.supabase.table("projects")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("updated_at", desc=True)\
-            .execute()
-        
-        return response.data
-    
-    async def get_project_by_id(self, project_id: str) -> Optional[dict]:
-        """Get a project by ID"""
-        response = self.supabase.table("projects")\
-            .select("*")\
-            .eq("id", project_id)\
-            .execute()
-        
-        return response.data[0] if response.data else None
-    
-    async def create_project(self, user: User, name: str, description: Optional[str] = None, include_backend: bool = False) -> dict:
-        """Create a new project with initial spec files"""
-        project_id = str(uuid.uuid4())
-        
-        # Create project
-        project_data = {
-            "id": project_id,
-            "user_id": user.id,
-            "name": name,
-            "description": description,
-            "status": "draft",
-            "tier": user.tier,
-        }
-        
-        project_response = self.supabase.table("projects").insert(project_data).execute()
-        
-        if not project_response.data:
-            raise Exception("Failed to create project")
-        
-        # Generate AI-powered spec files if description provided
-        if description:
-            await self._generate_ai_specs(project_id, user.id, name, description, include_backend)
-        else:
-            await self._initialize_spec_files(project_id, user.id)
-        
-        return project_response.data[0]
-    
-    async def _generate_ai_specs(self, project_id: str, user_id: str, project_name: str, description: str, include_backend: bool = False):
-        """Generate AI-powered specification files"""
-        from app.services.spec_generator import spec_generator
-        from app.services.supabase_generator import supabase_generator
-        
-        # Generate specs using AI
-        specs = await spec_generator.generate_specs_from_prompt(description, project_name)
-        
-        # Generate backend specs if requested
-        if include_backend:
-            # Analyze prompt for backend requirements
-            analysis = spec_generator._analyze_prompt(description)
-            backend_specs = supabase_generator.generate_backend_specs(analysis, project_name)
-            
-            # Add backend sections to existing specs
-            if backend_specs:
-                specs["design"] += f"\n\n## Backend Architecture\n\n### Supabase Integration\n- Database: PostgreSQL with Row Level Security\n- Authentication: Supabase Auth with JWT\n- Real-time: WebSocket subscriptions\n- Edge Functions: Serverless API endpoints\n\n### Database Schema\nSee backend_schema.sql for complete database structure"
-                
-                specs["requirements"] += f"\n\n## Backend Requirements\n\n### Data Persistence\n- All user data stored in Supabase PostgreSQL\n- Real-time synchronization across devices\n- Offline-first architecture with sync\n\n### API Requirements\n- RESTful API with Supabase client\n- Real-time subscriptions for live updates\n- Secure authentication and authorization"
-                
-                specs["tasks"] += f"\n\n## Backend Implementation Tasks\n\n### Database Setup\n- [ ] Create Supabase project\n- [ ] Run database migrations\n- [ ] Configure Row Level Security\n- [ ] Set up authentication providers\n\n### API Integration\n- [ ] Install Supabase client\n- [ ] Implement authentication flow\n- [ ] Create data access layer\n- [ ] Set up real-time subscriptions"
-                
-                # Create additional backend spec files
-                specs["backend_schema"] = backend_specs.get("database_schema", "")
-                specs["api_endpoints"] = backend_specs.get("api_endpoints", "")
-                specs["auth_setup"] = backend_specs.get("auth_setup", "")
-                specs["realtime_setup"] = backend_specs.get("realtime_setup", "")
-        
-        # Create spec files with generated content
-        for spec_type, content in specs.items():
-            if content.strip():  # Only create non-empty specs
-                spec_id = str(uuid.uuid4())
-                spec_data = {
-                    "id": spec_id,
-                    "project_id": project_id,
-                    "file_type": spec_type,
-                    "content": content,
-                    "version": 1,
-                    "created_by": user_id,
-                }
-                self.supabase.table("spec_files").insert(spec_data).execute()
-    
-    async def _initialize_spec_files(self, project_id: str, user_id: str):
-        """Initialize the three spec files for a new project"""
-        spec_templates = {
-            "design": """# Design Specification
+# Default spec file contents, built once at import rather than per project
+_SPEC_TEMPLATES = {
+    "design": """# Design Specification
 
 ## Architecture Overview
 Your app architecture will be defined here...
@@ -124,7 +35,7 @@ Your app architecture will be defined here...
 - Screen size considerations
 - Accessibility features
 """,
-            "requirements": """# Requirements Specification
+    "requirements": """# Requirements Specification
 
 ## Project Overview
 Brief description of your mobile application...
@@ -146,7 +57,7 @@ Each user story should have clear acceptance criteria...
 - Security requirements
 - Scalability requirements
 """,
-            "tasks": """# Implementation Tasks
+    "tasks": """# Implementation Tasks
 
 ## Phase 1: Setup and Foundation
 - [ ] Set up project structure
@@ -168,31 +79,167 @@ Each user story should have clear acceptance criteria...
 - [ ] Create app store assets
 - [ ] Deploy to production
 """
+}
+
+
+# Burst absorber for the read paths: rows rarely change within a few
+# seconds, so repeated reads during a request burst skip the round trip.
+# Writes invalidate eagerly; the short TTL bounds any staleness that
+# slips past them (e.g. writes from another worker).
+_read_cache = TTLCache(maxsize=2048, ttl=5)
+
+
+# Backend addenda appended to the generated specs when include_backend
+# is set; constants so the literals exist once, joined in a single pass
+_BACKEND_DESIGN_ADDENDUM = "\n\n## Backend Architecture\n\n### Supabase Integration\n- Database: PostgreSQL with Row Level Security\n- Authentication: Supabase Auth with JWT\n- Real-time: WebSocket subscriptions\n- Edge Functions: Serverless API endpoints\n\n### Database Schema\nSee backend_schema.sql for complete database structure"
+
+_BACKEND_REQUIREMENTS_ADDENDUM = "\n\n## Backend Requirements\n\n### Data Persistence\n- All user data stored in Supabase PostgreSQL\n- Real-time synchronization across devices\n- Offline-first architecture with sync\n\n### API Requirements\n- RESTful API with Supabase client\n- Real-time subscriptions for live updates\n- Secure authentication and authorization"
+
+_BACKEND_TASKS_ADDENDUM = "\n\n## Backend Implementation Tasks\n\n### Database Setup\n- [ ] Create Supabase project\n- [ ] Run database migrations\n- [ ] Configure Row Level Security\n- [ ] Set up authentication providers\n\n### API Integration\n- [ ] Install Supabase client\n- [ ] Implement authentication flow\n- [ ] Create data access layer\n- [ ] Set up real-time subscriptions"
+
+
+class ProjectService:
+    async def get_user_projects(self, user_id: str) -> List[dict]:
+        """Get all projects for a user"""
+        cached = _read_cache.get(("user", user_id))
+        if cached is not None:
+            return cached
+
+        supabase = await get_supabase_async()
+        response = await supabase.table("projects")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .order("updated_at", desc=True)\
+            .execute()
+
+        _read_cache[("user", user_id)] = response.data
+        return response.data
+    
+    async def get_project_by_id(self, project_id: str) -> Optional[dict]:
+        """Get a project by ID"""
+        cached = _read_cache.get(("project", project_id))
+        if cached is not None:
+            return cached
+
+        supabase = await get_supabase_async()
+        response = await supabase.table("projects")\
+            .select("*")\
+            .eq("id", project_id)\
+            .maybe_single()\
+            .execute()
+
+        # postgrest 0.16 returns None outright when no row matches
+        if response is None or response.data is None:
+            return None
+        _read_cache[("project", project_id)] = response.data
+        return response.data
+    
+    async def create_project(self, user: User, name: str, description: Optional[str] = None, include_backend: bool = False) -> dict:
+        """Create a new project with initial spec files"""
+        project_id = str(uuid.uuid4())
+        
+        # Create project
+        project_data = {
+            "id": project_id,
+            "user_id": user.id,
+            "name": name,
+            "description": description,
+            "status": "draft",
+            "tier": user.tier,
         }
         
-        for spec_type, content in spec_templates.items():
-            spec_id = str(uuid.uuid4())
-            spec_data = {
-                "id": spec_id,
+        supabase = await get_supabase_async()
+
+        # Start the project insert, then build the spec rows (pure CPU)
+        # while that round trip is in flight; the spec insert itself must
+        # wait for the project row because of the FK on project_id
+        insert_task = asyncio.create_task(
+            supabase.table("projects").insert(project_data).execute()
+        )
+
+        if description:
+            spec_rows = self._build_ai_spec_rows(project_id, user.id, name, description, include_backend)
+        else:
+            spec_rows = self._build_default_spec_rows(project_id, user.id)
+
+        project_response = await insert_task
+
+        if not project_response.data:
+            raise Exception("Failed to create project")
+
+        if spec_rows:
+            await supabase.table("spec_files").insert(spec_rows).execute()
+
+        _read_cache.pop(("user", user.id), None)
+        return project_response.data[0]
+    
+    def _build_ai_spec_rows(self, project_id: str, user_id: str, project_name: str, description: str, include_backend: bool = False) -> List[dict]:
+        """Build AI-generated spec rows for a new project"""
+        
+        # Generate specs using AI
+        specs = spec_generator.generate_specs_from_prompt(description, project_name)
+        
+        # Generate backend specs if requested
+        if include_backend:
+            # Analyze prompt for backend requirements
+            analysis = spec_generator._analyze_prompt(description)
+            backend_specs = supabase_generator.generate_backend_specs(analysis, project_name)
+            
+            # Add backend sections to existing specs; one concatenation
+            # per spec against module-level constants
+            if backend_specs:
+                specs["design"] += _BACKEND_DESIGN_ADDENDUM
+                specs["requirements"] += _BACKEND_REQUIREMENTS_ADDENDUM
+                specs["tasks"] += _BACKEND_TASKS_ADDENDUM
+                
+                # Create additional backend spec files
+                specs["backend_schema"] = backend_specs.get("database_schema", "")
+                specs["api_endpoints"] = backend_specs.get("api_endpoints", "")
+                specs["auth_setup"] = backend_specs.get("auth_setup", "")
+                specs["realtime_setup"] = backend_specs.get("realtime_setup", "")
+        
+        # Rows for one batched insert, skipping empty specs; ids come
+        # from the column default server-side
+        return [
+            {
+                "project_id": project_id,
+                "file_type": spec_type,
+                "content": content,
+                "version": 1,
+                "created_by": user_id,
+            }
+            for spec_type, content in specs.items()
+            if content.strip()
+        ]
+    
+    def _build_default_spec_rows(self, project_id: str, user_id: str) -> List[dict]:
+        """Build the three template spec rows for a blank project"""
+        return [
+            {
                 "project_id": project_id,
                 "file_type": spec_type,
                 "content": content,
                 "version": 1,
                 "created_by": user_id,
             }
-            self.supabase.table("spec_files").insert(spec_data).execute()
+            for spec_type, content in _SPEC_TEMPLATES.items()
+        ]
     
     async def update_project_status(self, project_id: str, status: str):
         """Update project status"""
-        self.supabase.table("projects")\
+        supabase = await get_supabase_async()
+        await supabase.table("projects")\
             .update({"status": status})\
             .eq("id", project_id)\
             .execute()
+        _read_cache.pop(("project", project_id), None)
     
     async def delete_project(self, project_id: str):
         """Delete a project and all related data"""
         # Supabase will handle cascade deletion due to foreign key constraints
-        self.supabase.table("projects").delete().eq("id", project_id).execute()
+        supabase = await get_supabase_async()
+        await supabase.table("projects").delete().eq("id", project_id).execute()
+        _read_cache.pop(("project", project_id), None)
 
 
 # Singleton instance
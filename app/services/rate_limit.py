@@ -0,0 +1,40 @@
+"""
+Local token-bucket rate limiting for upstream AI providers
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket with monotonic-clock refill.
+
+    acquire(n) waits until n tokens are available, so bursts queue
+    locally for a short, predictable delay instead of drawing 429s from
+    the provider — which cost a full round trip, a retry, and (for
+    token-metered APIs) quota burned on the failed call.
+    """
+
+    def __init__(self, rate_per_sec: float, burst: float):
+        self.rate = rate_per_sec
+        self.capacity = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        # Waiters queue on the lock, which keeps acquisition roughly FIFO
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self, n: float = 1.0) -> None:
+        """Take n tokens, sleeping until the bucket has refilled enough"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                await asyncio.sleep((n - self._tokens) / self.rate)
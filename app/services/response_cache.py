@@ -0,0 +1,45 @@
+"""
+Exact-match cache for AI responses
+"""
+import hashlib
+from typing import Any, Optional
+
+import orjson
+from cachetools import TTLCache
+
+
+class ResponseCache:
+    """In-process exact-match cache for LLM completions.
+
+    Keys are blake2b digests of a canonical (sorted-key) serialization of
+    the request fields, so dict ordering inside the context never
+    fragments entries. Repeated prompts — very common for the templated
+    "add feature" / "fix bug" flows — skip the upstream LLM round trip
+    entirely on a hit.
+
+    A semantic tier (embed the prompt, nearest-neighbour lookup over past
+    prompts) would slot in behind the same get/put interface; this tree
+    carries no embedding model or vector store, so only the exact tier
+    exists for now.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Canonical digest of the request fields that shape the response.
+
+        blake2b is the fastest keyed hash in the stdlib and 128 bits is
+        plenty for cache keying — this is not a security boundary.
+        """
+        payload = orjson.dumps(
+            parts, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        )
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def put(self, key: str, value: Any) -> None:
+        self._cache[key] = value
@@ -1,100 +1,174 @@
 """
 E2B Sandbox management service
 """
-from typing import Optional, Dict, Any
-from app.database import get_supabase
+from typing import Optional, Dict, Any, Final, List
+from cachetools import TTLCache
+from app.database import get_supabase_async
 import uuid
 
 
+# Burst absorber for preview polling: a ready sandbox row is terminal
+# for its lifetime, so rapid repeated reads within a few seconds skip
+# the Supabase round trip. Writes invalidate eagerly; the short TTL
+# bounds staleness that slips past them.
+_sandbox_cache = TTLCache(maxsize=2048, ttl=3)
+
+
+# Placeholder QR data URL, built once at import and shared by every
+# sandbox row; in production the real generator (e.g. segno with a fixed
+# mask) would sit behind a per-URL cache keyed on the stable preview URL
+_PLACEHOLDER_QR: Final[str] = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+
+
 class SandboxService:
-    """Service for managing E2B sandboxes"""
-    
-    def __init__(self):
-        self.supabase = get_supabase()
-    
-    async def create_sandbox(self, project_id: str) -> Dict[str, Any]:
-        """Create a new E2B sandbox for a project"""
-        # In production, this would use the E2B SDK
-        # For now, create a mock sandbox entry
-        
-        sandbox_id = str(uuid.uuid4())
+    """Service for managing E2B sandboxes.
+
+    All queries go through the shared async client so the event loop is
+    released for the duration of each Supabase round trip instead of
+    blocking the worker.
+    """
+
+    def _new_sandbox_row(self, project_id: str) -> Dict[str, Any]:
+        """Build a sandbox row in its final, ready state.
+
+        The old insert-then-update pair cost two Supabase round trips
+        (plus a simulated setup sleep) for state that is fully known up
+        front, so rows are written ready in a single statement.
+        """
         e2b_sandbox_id = f"sb_{uuid.uuid4().hex[:8]}"
-        
-        sandbox_data = {
-            "id": sandbox_id,
+        preview_url = f"https://expo.dev/@preview/{e2b_sandbox_id}"
+        return {
+            "id": str(uuid.uuid4()),
             "project_id": project_id,
             "e2b_sandbox_id": e2b_sandbox_id,
-            "status": "initializing",
-            "preview_url": None,
-            "qr_code": None,
+            "status": "ready",
+            "preview_url": preview_url,
+            "qr_code": self._generate_qr_code(preview_url),
             "cache_id": None,
+            "last_active": "now()",
         }
-        
-        response = self.supabase.table("sandboxes").insert(sandbox_data).execute()
-        
+
+    async def create_sandbox(self, project_id: str) -> Dict[str, Any]:
+        """Create a new E2B sandbox for a project"""
+        # In production, this would use the E2B SDK
+        # For now, create a mock sandbox entry
+        supabase = await get_supabase_async()
+        response = await supabase.table("sandboxes")\
+            .insert(self._new_sandbox_row(project_id))\
+            .execute()
+
         if response.data:
-            # Simulate sandbox initialization
-            await self._initialize_sandbox(sandbox_id, e2b_sandbox_id)
             return response.data[0]
-        
+
         raise Exception("Failed to create sandbox")
-    
-    async def _initialize_sandbox(self, sandbox_id: str, e2b_sandbox_id: str):
-        """Initialize the sandbox with Expo template"""
-        # Simulate initialization process
-        import asyncio
-        await asyncio.sleep(1)  # Simulate setup time
-        
-        # Update sandbox status
-        preview_url = f"https://expo.dev/@preview/{e2b_sandbox_id}"
-        qr_code = self._generate_qr_code(preview_url)
-        
-        self.supabase.table("sandboxes")\
-            .update({
-                "status": "ready",
-                "preview_url": preview_url,
-                "qr_code": qr_code,
-                "last_active": "now()"
-            })\
-            .eq("id", sandbox_id)\
+
+    async def create_sandboxes(self, project_ids: List[str]) -> List[Dict[str, Any]]:
+        """Create sandboxes for many projects in bulk.
+
+        One array insert per 1,000-row chunk instead of a round trip per
+        project — the path for workspace imports/restores that would
+        otherwise loop create_sandbox.
+        """
+        created: List[Dict[str, Any]] = []
+        supabase = await get_supabase_async()
+        for start in range(0, len(project_ids), 1000):
+            rows = [
+                self._new_sandbox_row(project_id)
+                for project_id in project_ids[start:start + 1000]
+            ]
+            response = await supabase.table("sandboxes").insert(rows).execute()
+            created.extend(response.data or [])
+        return created
+
+    async def get_or_create_sandbox(self, project_id: str) -> Dict[str, Any]:
+        """Return the project's sandbox, creating it if absent.
+
+        The cold path is one race-safe upsert against the unique
+        project_id index: DO NOTHING (ignore_duplicates) returns no row
+        only when a concurrent request won the insert, in which case the
+        winner's row is read back. A merge upsert would also be a single
+        statement but clobbers the live row's identity, which restore
+        relies on keeping.
+        """
+        sandbox = await self.get_sandbox(project_id)
+        if sandbox:
+            return sandbox
+
+        supabase = await get_supabase_async()
+        response = await supabase.table("sandboxes")\
+            .upsert(
+                self._new_sandbox_row(project_id),
+                on_conflict="project_id",
+                ignore_duplicates=True,
+            )\
             .execute()
+        if response.data:
+            return response.data[0]
+
+        sandbox = await self.get_sandbox(project_id)
+        if sandbox:
+            return sandbox
+        raise Exception("Failed to create sandbox")
     
-    def _generate_qr_code(self, url: str) -> str:
+    @staticmethod
+    def _generate_qr_code(url: str) -> str:
         """Generate QR code for the preview URL"""
         # In production, use qrcode library
-        # For now, return a placeholder data URL
-        return "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+        # For now, return the shared placeholder data URL
+        return _PLACEHOLDER_QR
     
     async def get_sandbox(self, project_id: str) -> Optional[Dict[str, Any]]:
         """Get sandbox for a project"""
-        response = self.supabase.table("sandboxes")\
-            .select("*")\
+        cached = _sandbox_cache.get(project_id)
+        if cached is not None:
+            return cached
+
+        # project_id is unique (migration 007), so the lookup is an
+        # equality probe with no sort; only the columns callers read are
+        # fetched (the QR data URL dominates the payload either way)
+        supabase = await get_supabase_async()
+        response = await supabase.table("sandboxes")\
+            .select("id,project_id,e2b_sandbox_id,status,preview_url,qr_code,cache_id")\
             .eq("project_id", project_id)\
-            .order("created_at", desc=True)\
             .limit(1)\
             .execute()
-        
-        return response.data[0] if response.data else None
+
+        sandbox = response.data[0] if response.data else None
+        # Only cache terminal rows so an initializing sandbox still
+        # polls fresh until it settles
+        if sandbox is not None and sandbox.get("status") == "ready":
+            _sandbox_cache[project_id] = sandbox
+        return sandbox
+
+    @staticmethod
+    def _invalidate(sandbox_id: str) -> None:
+        """Drop any cached row for a sandbox id.
+
+        Writers keyed by sandbox id don't know the project id, so this
+        scans the (small, short-lived) cache for the matching row.
+        """
+        for project_id, row in list(_sandbox_cache.items()):
+            if row.get("id") == sandbox_id:
+                _sandbox_cache.pop(project_id, None)
+                break
     
     async def update_sandbox_files(self, sandbox_id: str, files: Dict[str, str]):
         """Update files in the sandbox"""
         # In production, this would sync files to E2B
         # For now, just update the last_active timestamp
-        self.supabase.table("sandboxes")\
+        supabase = await get_supabase_async()
+        await supabase.table("sandboxes")\
             .update({"last_active": "now()"})\
             .eq("id", sandbox_id)\
             .execute()
-        
+
+        self._invalidate(sandbox_id)
         return {"message": "Files updated successfully"}
     
     async def get_preview_info(self, project_id: str) -> Dict[str, Any]:
         """Get preview information for a project"""
-        sandbox = await self.get_sandbox(project_id)
-        
-        if not sandbox:
-            # Create sandbox if it doesn't exist
-            sandbox = await self.create_sandbox(project_id)
-        
+        sandbox = await self.get_or_create_sandbox(project_id)
+
         return {
             "status": sandbox["status"],
             "preview_url": sandbox["preview_url"],
@@ -106,18 +180,30 @@ class SandboxService:
         cache_id = f"cache_{uuid.uuid4().hex[:8]}"
         
         # In production, this would snapshot the E2B sandbox
-        self.supabase.table("sandboxes")\
+        supabase = await get_supabase_async()
+        await supabase.table("sandboxes")\
             .update({"cache_id": cache_id})\
             .eq("id", sandbox_id)\
             .execute()
-        
+
+        self._invalidate(sandbox_id)
         return cache_id
     
     async def restore_sandbox(self, project_id: str, cache_id: str) -> Dict[str, Any]:
         """Restore sandbox from cached state"""
         # In production, this would restore from E2B cache
-        # For now, just create a new sandbox
-        return await self.create_sandbox(project_id)
+        # For now, replace the project's sandbox row with a fresh one
+        # (merge upsert against the unique project_id index)
+        supabase = await get_supabase_async()
+        response = await supabase.table("sandboxes")\
+            .upsert(self._new_sandbox_row(project_id), on_conflict="project_id")\
+            .execute()
+
+        _sandbox_cache.pop(project_id, None)
+        if response.data:
+            return response.data[0]
+
+        raise Exception("Failed to restore sandbox")
 
 
 # Singleton instance
@@ -1,158 +1,128 @@
 """
 AI-powered specification generator service
 """
-from typing import Dict, Optional
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
 import re
 
 
-class SpecGeneratorService:
-    """Service for generating project specifications from user prompts"""
-    
-    def __init__(self):
-        pass
-    
-    async def generate_specs_from_prompt(self, user_prompt: str, project_name: str) -> Dict[str, str]:
-        """Generate all three spec files from a user prompt"""
-        
-        # Analyze the prompt to extract key information
-        analysis = self._analyze_prompt(user_prompt)
-        
-        # Generate each spec file
-        design_spec = self._generate_design_spec(analysis, project_name)
-        requirements_spec = self._generate_requirements_spec(analysis, project_name)
-        tasks_spec = self._generate_tasks_spec(analysis, project_name)
-        
-        return {
-            "design": design_spec,
-            "requirements": requirements_spec,
-            "tasks": tasks_spec
-        }
-    
-    def _analyze_prompt(self, prompt: str) -> Dict[str, any]:
-        """Analyze user prompt to extract key features and requirements"""
-        prompt_lower = prompt.lower()
-        
-        # Detect if backend is needed
-        backend_indicators = [
-            "database", "api", "server", "backend", "auth", "login", "signup", 
-            "save", "store", "sync", "user", "account", "payment", "real-time",
-            "notification", "chat", "messaging", "social", "admin", "dashboard"
-        ]
-        needs_backend = any(indicator in prompt_lower for indicator in backend_indicators)
-        
-        # Detect app type
-        app_types = {
-            "social": ["social", "chat", "messaging", "friends", "posts", "feed"],
-            "ecommerce": ["shop", "store", "buy", "sell", "cart", "payment", "product"],
-            "productivity": ["todo", "task", "note", "calendar", "reminder", "organize"],
-            "fitness": ["fitness", "workout", "exercise", "health", "steps", "calories"],
-            "finance": ["money", "budget", "expense", "bank", "finance", "investment"],
-            "education": ["learn", "course", "study", "quiz", "education", "lesson"],
-            "entertainment": ["game", "music", "video", "movie", "entertainment"],
-            "utility": ["tool", "utility", "calculator", "converter", "helper"]
-        }
-        
-        detected_type = "general"
-        for app_type, keywords in app_types.items():
-            if any(keyword in prompt_lower for keyword in keywords):
-                detected_type = app_type
-                break
-        
-        # Detect features
-        features = []
-        feature_keywords = {
-            "authentication": ["login", "signup", "auth", "user", "account"],
-            "database": ["save", "store", "data", "database", "persist"],
-            "api": ["api", "server", "backend", "fetch", "request"],
-            "realtime": ["real-time", "live", "instant", "chat", "messaging"],
-            "navigation": ["screen", "page", "navigate", "route", "tab"],
-            "notifications": ["notify", "alert", "push", "notification"],
-            "camera": ["camera", "photo", "image", "picture"],
-            "location": ["location", "map", "gps", "address"],
-            "payment": ["pay", "payment", "stripe", "purchase", "buy"],
-            "social": ["share", "social", "facebook", "twitter", "instagram"],
-            "offline": ["offline", "sync", "cache", "local"],
-            "admin": ["admin", "dashboard", "management", "control"],
-            "analytics": ["analytics", "tracking", "metrics", "stats"]
-        }
-        
-        for feature, keywords in feature_keywords.items():
-            if any(keyword in prompt_lower for keyword in keywords):
-                features.append(feature)
-        
-        # Extract entities (nouns that might be data models)
-        entities = self._extract_entities(prompt)
-        
-        return {
-            "app_type": detected_type,
-            "features": features,
-            "entities": entities,
-            "needs_backend": needs_backend,
-            "original_prompt": prompt
-        }
-    
-    def _extract_entities(self, prompt: str) -> list:
-        """Extract potential data entities from the prompt"""
-        # Simple entity extraction - in production, use NLP
-        common_entities = [
-            "user", "profile", "post", "comment", "like", "follow",
-            "product", "order", "cart", "payment", "review",
-            "task", "project", "note", "reminder", "category",
-            "workout", "exercise", "meal", "goal", "progress",
-            "transaction", "budget", "expense", "income", "account"
-        ]
-        
-        found_entities = []
-        prompt_lower = prompt.lower()
-        
-        for entity in common_entities:
-            if entity in prompt_lower:
-                found_entities.append(entity.capitalize())
-        
-        return found_entities[:5]  # Limit to 5 entities
-    
-    def _generate_design_spec(self, analysis: Dict, project_name: str) -> str:
-        """Generate design specification"""
-        app_type = analysis["app_type"]
-        features = analysis["features"]
-        
-        # App type specific design patterns
-        design_patterns = {
-            "social": {
-                "navigation": "Tab Navigation with Feed, Profile, Messages, Notifications",
-                "key_screens": ["Feed", "Profile", "Chat", "Notifications", "Settings"],
-                "ui_elements": ["Avatar", "Post Card", "Comment Section", "Like Button", "Follow Button"]
-            },
-            "ecommerce": {
-                "navigation": "Stack Navigation with Product Catalog, Cart, Profile",
-                "key_screens": ["Product List", "Product Detail", "Cart", "Checkout", "Profile"],
-                "ui_elements": ["Product Card", "Add to Cart Button", "Price Display", "Rating Stars"]
-            },
-            "productivity": {
-                "navigation": "Tab Navigation with Tasks, Calendar, Settings",
-                "key_screens": ["Task List", "Task Detail", "Calendar", "Categories", "Settings"],
-                "ui_elements": ["Task Item", "Checkbox", "Date Picker", "Priority Indicator"]
-            }
-        }
-        
-        pattern = design_patterns.get(app_type, design_patterns["productivity"])
-        
-        return f"""# Design Specification - {project_name}
+def _alternation(keywords) -> "re.Pattern[str]":
+    """Compile a list of keywords into one substring alternation.
+
+    A single C-level regex scan over the prompt replaces a Python loop of
+    per-keyword ``in`` probes. Deliberately no word boundaries: the
+    original checks were plain substring tests ("user" matches "users"),
+    and the detection keeps that behaviour.
+    """
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+# Keyword tables compiled once at import; _analyze_prompt and
+# _extract_entities only run searches against the prebuilt patterns
+_BACKEND_INDICATORS = (
+    "database", "api", "server", "backend", "auth", "login", "signup",
+    "save", "store", "sync", "user", "account", "payment", "real-time",
+    "notification", "chat", "messaging", "social", "admin", "dashboard"
+)
+
+_APP_TYPE_KEYWORDS = MappingProxyType({
+    "social": ["social", "chat", "messaging", "friends", "posts", "feed"],
+    "ecommerce": ["shop", "store", "buy", "sell", "cart", "payment", "product"],
+    "productivity": ["todo", "task", "note", "calendar", "reminder", "organize"],
+    "fitness": ["fitness", "workout", "exercise", "health", "steps", "calories"],
+    "finance": ["money", "budget", "expense", "bank", "finance", "investment"],
+    "education": ["learn", "course", "study", "quiz", "education", "lesson"],
+    "entertainment": ["game", "music", "video", "movie", "entertainment"],
+    "utility": ["tool", "utility", "calculator", "converter", "helper"]
+})
+
+_FEATURE_KEYWORDS = MappingProxyType({
+    "authentication": ["login", "signup", "auth", "user", "account"],
+    "database": ["save", "store", "data", "database", "persist"],
+    "api": ["api", "server", "backend", "fetch", "request"],
+    "realtime": ["real-time", "live", "instant", "chat", "messaging"],
+    "navigation": ["screen", "page", "navigate", "route", "tab"],
+    "notifications": ["notify", "alert", "push", "notification"],
+    "camera": ["camera", "photo", "image", "picture"],
+    "location": ["location", "map", "gps", "address"],
+    "payment": ["pay", "payment", "stripe", "purchase", "buy"],
+    "social": ["share", "social", "facebook", "twitter", "instagram"],
+    "offline": ["offline", "sync", "cache", "local"],
+    "admin": ["admin", "dashboard", "management", "control"],
+    "analytics": ["analytics", "tracking", "metrics", "stats"]
+})
+
+# Simple entity extraction - in production, use NLP
+_COMMON_ENTITIES = (
+    "user", "profile", "post", "comment", "like", "follow",
+    "product", "order", "cart", "payment", "review",
+    "task", "project", "note", "reminder", "category",
+    "workout", "exercise", "meal", "goal", "progress",
+    "transaction", "budget", "expense", "income", "account"
+)
+
+_BACKEND_RE = _alternation(_BACKEND_INDICATORS)
+# All app-type keywords in one alternation with a named group per type:
+# a single scan of the prompt scores every category at once, and the
+# highest-scoring type wins instead of whichever bucket happened to be
+# declared first. Ties fall back to declaration order.
+_APP_TYPE_COMBINED_RE = re.compile(
+    "|".join(
+        f"(?P<{app_type}>{'|'.join(map(re.escape, kws))})"
+        for app_type, kws in _APP_TYPE_KEYWORDS.items()
+    )
+)
+_APP_TYPE_PRIORITY = MappingProxyType(
+    {app_type: i for i, app_type in enumerate(_APP_TYPE_KEYWORDS)}
+)
+_FEATURE_RE = MappingProxyType(
+    {feature: _alternation(kws) for feature, kws in _FEATURE_KEYWORDS.items()}
+)
+# One combined pass finds every entity mention; list order is restored
+# afterwards so the output matches the old per-entity loop exactly
+_ENTITY_RE = _alternation(_COMMON_ENTITIES)
+
+# App type specific design patterns
+_DESIGN_PATTERNS = MappingProxyType({
+    "social": {
+        "navigation": "Tab Navigation with Feed, Profile, Messages, Notifications",
+        "key_screens": ["Feed", "Profile", "Chat", "Notifications", "Settings"],
+        "ui_elements": ["Avatar", "Post Card", "Comment Section", "Like Button", "Follow Button"]
+    },
+    "ecommerce": {
+        "navigation": "Stack Navigation with Product Catalog, Cart, Profile",
+        "key_screens": ["Product List", "Product Detail", "Cart", "Checkout", "Profile"],
+        "ui_elements": ["Product Card", "Add to Cart Button", "Price Display", "Rating Stars"]
+    },
+    "productivity": {
+        "navigation": "Tab Navigation with Tasks, Calendar, Settings",
+        "key_screens": ["Task List", "Task Detail", "Calendar", "Categories", "Settings"],
+        "ui_elements": ["Task Item", "Checkbox", "Date Picker", "Priority Indicator"]
+    }
+})
+
+
+# Spec templates as constants: each call is one format_map over the
+# precomputed fragments instead of re-evaluating a multi-kB f-string
+_DESIGN_TEMPLATE = """# Design Specification - {project_name}
 
 ## Project Overview
-{analysis['original_prompt']}
+{original_prompt}
 
 ## App Type
-{app_type.capitalize()} Application
+{app_type} Application
 
 ## Architecture Overview
 
 ### Navigation Structure
-- **Primary Navigation**: {pattern['navigation']}
+- **Primary Navigation**: {navigation}
 - **Screen Flow**: Linear with modal overlays for forms and details
 
 ### Key Screens
-{chr(10).join([f"- **{screen}**: Main {screen.lower()} interface" for screen in pattern['key_screens']])}
+{key_screens_md}
 
 ## UI/UX Design
 
@@ -169,7 +139,7 @@ class SpecGeneratorService:
 - **Captions**: SF Pro Text, Regular, 12px
 
 ### Component Library
-{chr(10).join([f"- **{element}**: Reusable {element.lower()} component" for element in pattern['ui_elements']])}
+{ui_elements_md}
 
 ## Technical Stack
 
@@ -199,7 +169,7 @@ class SpecGeneratorService:
 - **Touch Targets**: Minimum 44x44pt tap areas
 
 ## Features Integration
-{chr(10).join([f"- **{feature.capitalize()}**: Integrated throughout the app experience" for feature in features])}
+{features_md}
 
 ## Performance Considerations
 - **Image Optimization**: WebP format with lazy loading
@@ -208,15 +178,10 @@ class SpecGeneratorService:
 - **Offline Support**: Core functionality available offline
 """
 
-    def _generate_requirements_spec(self, analysis: Dict, project_name: str) -> str:
-        """Generate requirements specification"""
-        features = analysis["features"]
-        entities = analysis["entities"]
-        
-        return f"""# Requirements Specification - {project_name}
+_REQUIREMENTS_TEMPLATE = """# Requirements Specification - {project_name}
 
 ## Project Overview
-{analysis['original_prompt']}
+{original_prompt}
 
 ## Functional Requirements
 
@@ -229,7 +194,7 @@ class SpecGeneratorService:
 - **US-004**: As a user, I want to reset my password so that I can regain access if forgotten
 
 #### Epic 2: Core Functionality
-{chr(10).join([f"- **US-{100+i:03d}**: As a user, I want to manage {entity.lower()}s so that I can organize my {entity.lower()} data" for i, entity in enumerate(entities)])}
+{entity_stories_md}
 
 #### Epic 3: Data Management
 - **US-201**: As a user, I want my data to be saved automatically so that I don't lose my work
@@ -237,7 +202,7 @@ class SpecGeneratorService:
 - **US-203**: As a user, I want to export my data so that I can back it up or migrate
 
 ### Feature Requirements
-{chr(10).join([f"- **{feature.upper()}-001**: Implement {feature} functionality with secure and reliable operation" for feature in features])}
+{feature_reqs_md}
 
 ## Acceptance Criteria
 
@@ -314,12 +279,7 @@ class SpecGeneratorService:
 - Backend API is reliable and performant
 """
 
-    def _generate_tasks_spec(self, analysis: Dict, project_name: str) -> str:
-        """Generate implementation tasks"""
-        features = analysis["features"]
-        entities = analysis["entities"]
-        
-        return f"""# Implementation Tasks - {project_name}
+_TASKS_TEMPLATE = """# Implementation Tasks - {project_name}
 
 ## Phase 1: Project Setup and Foundation (Week 1-2)
 
@@ -356,10 +316,10 @@ class SpecGeneratorService:
 ## Phase 3: Core Features Implementation (Week 5-8)
 
 ### Data Models and Storage
-{chr(10).join([f"- [ ] **DATA-{i+1:03d}**: Implement {entity} data model and CRUD operations" for i, entity in enumerate(entities)])}
+{entity_tasks_md}
 
 ### Feature Implementation
-{chr(10).join([f"- [ ] **FEAT-{i+1:03d}**: Implement {feature} functionality" for i, feature in enumerate(features)])}
+{feature_tasks_md}
 
 ### API Integration
 - [ ] **API-001**: Set up API client with authentication
@@ -440,6 +400,141 @@ class SpecGeneratorService:
 - **Mitigation**: Regular testing on minimum spec devices
 """
 
+class SpecGeneratorService:
+    """Service for generating project specifications from user prompts"""
+    
+    def __init__(self):
+        pass
+    
+    def generate_specs_from_prompt(self, user_prompt: str, project_name: str) -> Dict[str, str]:
+        """Generate all three spec files from a user prompt.
+
+        Plain def: this is pure template work with no I/O, so callers
+        skip the coroutine frame and event-loop round trip entirely.
+        Generation is deterministic, so repeated calls with the same
+        prompt and name (retries, duplicate project creations) come out
+        of the LRU cache. A fresh dict is returned each call so callers
+        can't mutate the cached tuple through it.
+        """
+        design, requirements, tasks = self._build_specs(user_prompt, project_name)
+        return {
+            "design": design,
+            "requirements": requirements,
+            "tasks": tasks
+        }
+
+    @lru_cache(maxsize=256)
+    def _build_specs(self, user_prompt: str, project_name: str) -> Tuple[str, str, str]:
+        """Assemble the spec trio in one pass.
+
+        The joined fragments (screen/feature/entity bullet blocks) are
+        computed once and interpolated into the module-level templates
+        through a shared parameter dict, instead of each spec rebuilding
+        its own comprehensions over the same analysis. Cached on the
+        singleton, so the bound-self key is a constant.
+        """
+
+        # Analyze the prompt to extract key information
+        analysis = self._analyze_prompt(user_prompt)
+        features = analysis["features"]
+        entities = analysis["entities"]
+        pattern = _DESIGN_PATTERNS.get(analysis["app_type"], _DESIGN_PATTERNS["productivity"])
+
+        params = {
+            "project_name": project_name,
+            "original_prompt": analysis["original_prompt"],
+            "app_type": analysis["app_type"].capitalize(),
+            "navigation": pattern["navigation"],
+            "key_screens_md": "\n".join(
+                f"- **{screen}**: Main {screen.lower()} interface"
+                for screen in pattern["key_screens"]
+            ),
+            "ui_elements_md": "\n".join(
+                f"- **{element}**: Reusable {element.lower()} component"
+                for element in pattern["ui_elements"]
+            ),
+            "features_md": "\n".join(
+                f"- **{feature.capitalize()}**: Integrated throughout the app experience"
+                for feature in features
+            ),
+            "entity_stories_md": "\n".join(
+                f"- **US-{100 + i:03d}**: As a user, I want to manage {entity.lower()}s so that I can organize my {entity.lower()} data"
+                for i, entity in enumerate(entities)
+            ),
+            "feature_reqs_md": "\n".join(
+                f"- **{feature.upper()}-001**: Implement {feature} functionality with secure and reliable operation"
+                for feature in features
+            ),
+            "entity_tasks_md": "\n".join(
+                f"- [ ] **DATA-{i + 1:03d}**: Implement {entity} data model and CRUD operations"
+                for i, entity in enumerate(entities)
+            ),
+            "feature_tasks_md": "\n".join(
+                f"- [ ] **FEAT-{i + 1:03d}**: Implement {feature} functionality"
+                for i, feature in enumerate(features)
+            ),
+        }
+
+        return (
+            _DESIGN_TEMPLATE.format_map(params),
+            _REQUIREMENTS_TEMPLATE.format_map(params),
+            _TASKS_TEMPLATE.format_map(params)
+        )
+    
+    def _analyze_prompt(self, prompt: str) -> Dict[str, any]:
+        """Analyze user prompt to extract key features and requirements.
+
+        Analysis is deterministic, so the scans live in a cached helper;
+        a fresh dict (and fresh lists) is built per call so callers never
+        alias the cached result. The dict shape is kept because the
+        backend generator reads it via .get().
+        """
+        app_type, features, entities, needs_backend = self._scan_prompt(prompt)
+        return {
+            "app_type": app_type,
+            "features": list(features),
+            "entities": list(entities),
+            "needs_backend": needs_backend,
+            "original_prompt": prompt
+        }
+
+    @lru_cache(maxsize=512)
+    def _scan_prompt(self, prompt: str) -> Tuple[str, Tuple[str, ...], Tuple[str, ...], bool]:
+        """Run the keyword scans once per distinct prompt"""
+        prompt_lower = prompt.lower()
+
+        # Detect if backend is needed
+        needs_backend = _BACKEND_RE.search(prompt_lower) is not None
+
+        # Detect app type: one scan scores every category; most keyword
+        # mentions wins, ties break on declaration order
+        counts = Counter(m.lastgroup for m in _APP_TYPE_COMBINED_RE.finditer(prompt_lower))
+        if counts:
+            detected_type = min(counts, key=lambda t: (-counts[t], _APP_TYPE_PRIORITY[t]))
+        else:
+            detected_type = "general"
+
+        # Detect features
+        features = tuple(feature for feature, rx in _FEATURE_RE.items() if rx.search(prompt_lower))
+
+        # Extract entities (nouns that might be data models)
+        entities = tuple(self._extract_entities(prompt))
+
+        return detected_type, features, entities, needs_backend
+    
+    def _extract_entities(self, prompt: str) -> list:
+        """Extract potential data entities from the prompt"""
+        prompt_lower = prompt.lower()
+
+        # One pass over the prompt (the hit set also dedups repeated
+        # mentions), then restore keyword-list order so the same five
+        # entities come back as the old per-entity loop; islice stops
+        # the restore as soon as the limit is reached
+        hits = {m.group(0) for m in _ENTITY_RE.finditer(prompt_lower)}
+        return list(islice(
+            (entity.capitalize() for entity in _COMMON_ENTITIES if entity in hits), 5
+        ))
+
 
 # Singleton instance
 spec_generator = SpecGeneratorService()
\ No newline at end of file
@@ -1,103 +1,64 @@
 """
 Supabase backend generator service for full-stack apps
 """
-from typing import Dict, List, Any
-import re
+from typing import Any, Dict, Iterator, Tuple
+import hashlib
 
+import orjson
+from cachetools import LRUCache
 
-class SupabaseBackendGenerator:
-    """Service for generating Supabase backend configurations and code"""
-    
-    def __init__(self):
-        pass
-    
-    def generate_backend_specs(self, analysis: Dict[str, Any], project_name: str) -> Dict[str, str]:
-        """Generate backend specifications including database schema and API endpoints"""
-        
-        if not analysis.get("needs_backend", False):
-            return {}
-        
-        # Generate database schema
-        database_schema = self._generate_database_schema(analysis, project_name)
-        
-        # Generate API endpoints
-        api_endpoints = self._generate_api_endpoints(analysis, project_name)
-        
-        # Generate authentication setup
-        auth_setup = self._generate_auth_setup(analysis, project_name)
-        
-        # Generate real-time subscriptions
-        realtime_setup = self._generate_realtime_setup(analysis, project_name)
-        
-        # Generate real-time subscriptions
-        realtime_setup = self._generate_realtime_setup(analysis, project_name)
-        
-        return {
-            "database_schema": database_schema,
-            "api_endpoints": api_endpoints,
-            "auth_setup": auth_setup,
-            "realtime_setup": realtime_setup
-        }
-    
-    def _generate_database_schema(self, analysis: Dict, project_name: str) -> str:
-        """Generate Supabase database schema SQL"""
-        entities = analysis.get("entities", [])
-        features = analysis.get("features", [])
-        
-        schema_sql = f"""-- {project_name} Database Schema
--- Generated for Supabase
-
--- Enable necessary extensions
-CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
-CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+# Shared result for frontend-only projects; treated as frozen, so the
+# no-backend path allocates nothing per call
+_EMPTY_SPECS: Dict[str, str] = {}
 
-"""
-        
-        # Generate tables based on entities
-        for entity in entities:
-            table_name = entity.lower() + "s"
-            schema_sql += f"""-- {entity} table
-CREATE TABLE {table_name} (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    
-    -- Add entity-specific fields based on type
-"""
-            
-            # Add fields based on entity type
-            if entity.lower() in ["user", "profile"]:
-                schema_sql += """    email VARCHAR(255) UNIQUE,
+# Entity-specific column blocks keyed by lowercased entity; aliases point
+# at the same string object so nothing is stored twice
+_USER_FIELDS = """    email VARCHAR(255) UNIQUE,
     name VARCHAR(255) NOT NULL,
     avatar_url TEXT,
     bio TEXT,
 """
-            elif entity.lower() in ["post", "article", "content"]:
-                schema_sql += """    title VARCHAR(255) NOT NULL,
+
+_POST_FIELDS = """    title VARCHAR(255) NOT NULL,
     content TEXT,
     author_id UUID REFERENCES users(id) ON DELETE CASCADE,
     published BOOLEAN DEFAULT FALSE,
 """
-            elif entity.lower() in ["product", "item"]:
-                schema_sql += """    name VARCHAR(255) NOT NULL,
+
+_PRODUCT_FIELDS = """    name VARCHAR(255) NOT NULL,
     description TEXT,
     price DECIMAL(10,2),
     image_url TEXT,
     category VARCHAR(100),
 """
-            elif entity.lower() in ["task", "todo"]:
-                schema_sql += """    title VARCHAR(255) NOT NULL,
+
+_TASK_FIELDS = """    title VARCHAR(255) NOT NULL,
     description TEXT,
     completed BOOLEAN DEFAULT FALSE,
     due_date TIMESTAMP WITH TIME ZONE,
     user_id UUID REFERENCES users(id) ON DELETE CASCADE,
 """
-            else:
-                schema_sql += f"""    name VARCHAR(255) NOT NULL,
+
+_DEFAULT_FIELDS = """    name VARCHAR(255) NOT NULL,
     description TEXT,
 """
-            
-            schema_sql += """);
+
+_ENTITY_FIELDS = {
+    "user": _USER_FIELDS,
+    "profile": _USER_FIELDS,
+    "post": _POST_FIELDS,
+    "article": _POST_FIELDS,
+    "content": _POST_FIELDS,
+    "product": _PRODUCT_FIELDS,
+    "item": _PRODUCT_FIELDS,
+    "task": _TASK_FIELDS,
+    "todo": _TASK_FIELDS,
+}
+
+# Table close + updated_at trigger. This was previously a plain string
+# appended per table, so the trigger names were emitted with a literal
+# "{table_name}" in the SQL; formatting the template fixes that.
+_TRIGGER_TEMPLATE = """);
 
 -- Create updated_at trigger
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -108,176 +69,96 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
-CREATE TRIGGER update_{table_name}_updated_at 
-    BEFORE UPDATE ON {table_name}
+CREATE TRIGGER update_{t}_updated_at 
+    BEFORE UPDATE ON {t}
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 """
-        
-        # Add authentication-related tables if needed
-        if "authentication" in features:
-            schema_sql += """-- User profiles table (extends Supabase auth.users)
-CREATE TABLE profiles (
-    id UUID REFERENCES auth.users(id) ON DELETE CASCADE PRIMARY KEY,
-    email VARCHAR(255),
-    name VARCHAR(255),
-    avatar_url TEXT,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
-
--- Enable RLS on profiles
-ALTER TABLE profiles ENABLE ROW LEVEL SECURITY;
-
--- Profiles are viewable by users who created them
-CREATE POLICY "Users can view own profile" ON profiles
-    FOR SELECT USING (auth.uid() = id);
-
--- Users can update their own profile
-CREATE POLICY "Users can update own profile" ON profiles
-    FOR UPDATE USING (auth.uid() = id);
-
--- Profiles are created when a user signs up
-CREATE OR REPLACE FUNCTION public.handle_new_user()
-RETURNS TRIGGER AS $$
-BEGIN
-    INSERT INTO public.profiles (id, email, name)
-    VALUES (NEW.id, NEW.email, NEW.raw_user_meta_data->>'name');
-    RETURN NEW;
-END;
-$$ LANGUAGE plpgsql SECURITY DEFINER;
 
-CREATE TRIGGER on_auth_user_created
-    AFTER INSERT ON auth.users
-    FOR EACH ROW EXECUTE FUNCTION public.handle_new_user();
 
+# Per-entity blocks bound once as whole templates: one str.format call
+# per entity instead of several f-string evaluations and appends
+_TABLE_DDL_TEMPLATE = """-- {e} table
+CREATE TABLE {t} (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    -- Add entity-specific fields based on type
 """
-        
-        # Add RLS policies for other tables
-        for entity in entities:
-            table_name = entity.lower() + "s"
-            schema_sql += f"""-- Enable RLS on {table_name}
-ALTER TABLE {table_name} ENABLE ROW LEVEL SECURITY;
 
--- Users can view all {table_name}
-CREATE POLICY "Users can view {table_name}" ON {table_name}
+_RLS_TEMPLATE = """-- Enable RLS on {t}
+ALTER TABLE {t} ENABLE ROW LEVEL SECURITY;
+
+-- Users can view all {t}
+CREATE POLICY "Users can view {t}" ON {t}
     FOR SELECT USING (true);
 
--- Users can insert their own {table_name}
-CREATE POLICY "Users can insert {table_name}" ON {table_name}
+-- Users can insert their own {t}
+CREATE POLICY "Users can insert {t}" ON {t}
     FOR INSERT WITH CHECK (true);
 
--- Users can update their own {table_name}
-CREATE POLICY "Users can update own {table_name}" ON {table_name}
+-- Users can update their own {t}
+CREATE POLICY "Users can update own {t}" ON {t}
     FOR UPDATE USING (true);
 
 """
-        
-        return schema_sql
-    
-    def _generate_api_endpoints(self, analysis: Dict, project_name: str) -> str:
-        """Generate API endpoint documentation and client code"""
-        entities = analysis.get("entities", [])
-        
-        api_doc = f"""# {project_name} API Endpoints
-
-## Supabase Client Setup
-
-```javascript
-import {{ createClient }} from '@supabase/supabase-js'
 
-const supabaseUrl = 'YOUR_SUPABASE_URL'
-const supabaseKey = 'YOUR_SUPABASE_ANON_KEY'
-
-export const supabase = createClient(supabaseUrl, supabaseKey)
-```
-
-## Authentication
+_REALTIME_HOOK_TEMPLATE = """
+export const use{e}Subscription = () => {{
+  const [data, setData] = useState([])
 
-```javascript
-// Sign up
-const {{ data, error }} = await supabase.auth.signUp({{
-  email: 'user@example.com',
-  password: 'password123',
-  options: {{
-    data: {{
-      name: 'John Doe'
+  useEffect(() => {{
+    // Get initial data
+    const fetchData = async () => {{
+      const {{ data: initialData }} = await supabase
+        .from('{t}')
+        .select('*')
+      setData(initialData || [])
     }}
-  }}
-}})
-
-// Sign in
-const {{ data, error }} = await supabase.auth.signInWithPassword({{
-  email: 'user@example.com',
-  password: 'password123'
-}})
-
-// Sign out
-const {{ error }} = await supabase.auth.signOut()
+    
+    fetchData()
 
-// Get current user
-const {{ data: {{ user }} }} = await supabase.auth.getUser()
-```
+    // Subscribe to changes
+    const subscription = supabase
+      .channel('{t}_changes')
+      .on('postgres_changes', 
+        {{ 
+          event: '*', 
+          schema: 'public', 
+          table: '{t}' 
+        }}, 
+        (payload) => {{
+          console.log('Change received!', payload)
+          
+          if (payload.eventType === 'INSERT') {{
+            setData(prev => [...prev, payload.new])
+          }} else if (payload.eventType === 'UPDATE') {{
+            setData(prev => prev.map(item => 
+              item.id === payload.new.id ? payload.new : item
+            ))
+          }} else if (payload.eventType === 'DELETE') {{
+            setData(prev => prev.filter(item => item.id !== payload.old.id))
+          }}
+        }}
+      )
+      .subscribe()
 
-## Data Operations
+    return () => {{
+      subscription.unsubscribe()
+    }}
+  }}, [])
 
+  return data
+}}
 """
-        
-        # Generate CRUD operations for each entity
-        for entity in entities:
-            table_name = entity.lower() + "s"
-            entity_name = entity.lower()
-            
-            api_doc += f"""### {entity} Operations
 
-```javascript
-// Get all {table_name}
-const {{ data: {table_name}, error }} = await supabase
-  .from('{table_name}')
-  .select('*')
 
-// Get single {entity_name}
-const {{ data: {entity_name}, error }} = await supabase
-  .from('{table_name}')
-  .select('*')
-  .eq('id', {entity_name}Id)
-  .single()
 
-// Create {entity_name}
-const {{ data, error }} = await supabase
-  .from('{table_name}')
-  .insert([
-    {{ 
-      name: 'Example {entity}',
-      description: 'Example description'
-    }}
-  ])
-  .select()
-
-// Update {entity_name}
-const {{ data, error }} = await supabase
-  .from('{table_name}')
-  .update({{ name: 'Updated {entity}' }})
-  .eq('id', {entity_name}Id)
-  .select()
-
-// Delete {entity_name}
-const {{ data, error }} = await supabase
-  .from('{table_name}')
-  .delete()
-  .eq('id', {entity_name}Id)
-```
-
-"""
-        
-        return api_doc
-    
-    def _generate_auth_setup(self, analysis: Dict, project_name: str) -> str:
-        """Generate authentication setup guide"""
-        if "authentication" not in analysis.get("features", []):
-            return ""
-        
-        return f"""# {project_name} Authentication Setup
+# Large JS/markdown bodies as %-format module constants: the braces-
+# heavy boilerplate needs no escaping under %-formatting, and each call
+# is a single interpolation instead of re-evaluating a multi-kB f-string
+_AUTH_SETUP_TMPL = """# %(project_name)s Authentication Setup
 
 ## Supabase Auth Configuration
 
@@ -299,110 +180,189 @@ Customize email templates in Authentication > Email Templates:
 
 ```javascript
 // hooks/useAuth.js
-import {{ useState, useEffect, createContext, useContext }} from 'react'
-import {{ supabase }} from '../lib/supabase'
+import { useState, useEffect, createContext, useContext } from 'react'
+import { supabase } from '../lib/supabase'
 
-const AuthContext = createContext({{}})
+const AuthContext = createContext({})
 
-export const useAuth = () => {{
+export const useAuth = () => {
   const context = useContext(AuthContext)
-  if (!context) {{
+  if (!context) {
     throw new Error('useAuth must be used within AuthProvider')
-  }}
+  }
   return context
-}}
+}
 
-export const AuthProvider = ({{ children }}) => {{
+export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null)
   const [loading, setLoading] = useState(true)
 
-  useEffect(() => {{
+  useEffect(() => {
     // Get initial session
-    supabase.auth.getSession().then(({{ data: {{ session }} }}) => {{
+    supabase.auth.getSession().then(({ data: { session } }) => {
       setUser(session?.user ?? null)
       setLoading(false)
-    }})
+    })
 
     // Listen for auth changes
-    const {{ data: {{ subscription }} }} = supabase.auth.onAuthStateChange(
-      async (event, session) => {{
+    const { data: { subscription } } = supabase.auth.onAuthStateChange(
+      async (event, session) => {
         setUser(session?.user ?? null)
         setLoading(false)
-      }}
+      }
     )
 
     return () => subscription.unsubscribe()
-  }}, [])
+  }, [])
 
-  const signUp = async (email, password, userData = {{}}) => {{
-    const {{ data, error }} = await supabase.auth.signUp({{
+  const signUp = async (email, password, userData = {}) => {
+    const { data, error } = await supabase.auth.signUp({
       email,
       password,
-      options: {{ data: userData }}
-    }})
-    return {{ data, error }}
-  }}
+      options: { data: userData }
+    })
+    return { data, error }
+  }
 
-  const signIn = async (email, password) => {{
-    const {{ data, error }} = await supabase.auth.signInWithPassword({{
+  const signIn = async (email, password) => {
+    const { data, error } = await supabase.auth.signInWithPassword({
       email,
       password
-    }})
-    return {{ data, error }}
-  }}
+    })
+    return { data, error }
+  }
 
-  const signOut = async () => {{
-    const {{ error }} = await supabase.auth.signOut()
-    return {{ error }}
-  }}
+  const signOut = async () => {
+    const { error } = await supabase.auth.signOut()
+    return { error }
+  }
 
-  const value = {{
+  const value = {
     user,
     loading,
     signUp,
     signIn,
     signOut
-  }}
+  }
 
   return (
-    <AuthContext.Provider value={{value}}>
-      {{children}}
+    <AuthContext.Provider value={value}>
+      {children}
     </AuthContext.Provider>
   )
-}}
+}
 ```
 
 ### 4. Protected Routes
 
 ```javascript
 // components/ProtectedRoute.js
-import {{ useAuth }} from '../hooks/useAuth'
-import {{ Navigate }} from 'react-router-native'
+import { useAuth } from '../hooks/useAuth'
+import { Navigate } from 'react-router-native'
 
-export const ProtectedRoute = ({{ children }}) => {{
-  const {{ user, loading }} = useAuth()
+export const ProtectedRoute = ({ children }) => {
+  const { user, loading } = useAuth()
 
-  if (loading) {{
+  if (loading) {
     return <LoadingScreen />
-  }}
+  }
 
-  if (!user) {{
+  if (!user) {
     return <Navigate to="/login" replace />
-  }}
+  }
 
   return children
-}}
+}
 ```
 """
-    
-    def _generate_realtime_setup(self, analysis: Dict, project_name: str) -> str:
-        """Generate real-time subscriptions setup"""
-        if "realtime" not in analysis.get("features", []):
-            return ""
-        
-        entities = analysis.get("entities", [])
-        
-        realtime_doc = f"""# {project_name} Real-time Setup
+
+_API_HEADER_TMPL = """# %(project_name)s API Endpoints
+
+## Supabase Client Setup
+
+```javascript
+import { createClient } from '@supabase/supabase-js'
+
+const supabaseUrl = 'YOUR_SUPABASE_URL'
+const supabaseKey = 'YOUR_SUPABASE_ANON_KEY'
+
+export const supabase = createClient(supabaseUrl, supabaseKey)
+```
+
+## Authentication
+
+```javascript
+// Sign up
+const { data, error } = await supabase.auth.signUp({
+  email: 'user@example.com',
+  password: 'password123',
+  options: {
+    data: {
+      name: 'John Doe'
+    }
+  }
+})
+
+// Sign in
+const { data, error } = await supabase.auth.signInWithPassword({
+  email: 'user@example.com',
+  password: 'password123'
+})
+
+// Sign out
+const { error } = await supabase.auth.signOut()
+
+// Get current user
+const { data: { user } } = await supabase.auth.getUser()
+```
+
+## Data Operations
+
+"""
+
+_ENTITY_CRUD_TMPL = """### %(e)s Operations
+
+```javascript
+// Get all %(t)s
+const { data: %(t)s, error } = await supabase
+  .from('%(t)s')
+  .select('*')
+
+// Get single %(en)s
+const { data: %(en)s, error } = await supabase
+  .from('%(t)s')
+  .select('*')
+  .eq('id', %(en)sId)
+  .single()
+
+// Create %(en)s
+const { data, error } = await supabase
+  .from('%(t)s')
+  .insert([
+    { 
+      name: 'Example %(e)s',
+      description: 'Example description'
+    }
+  ])
+  .select()
+
+// Update %(en)s
+const { data, error } = await supabase
+  .from('%(t)s')
+  .update({ name: 'Updated %(e)s' })
+  .eq('id', %(en)sId)
+  .select()
+
+// Delete %(en)s
+const { data, error } = await supabase
+  .from('%(t)s')
+  .delete()
+  .eq('id', %(en)sId)
+```
+
+"""
+
+_REALTIME_HEADER_TMPL = """# %(project_name)s Real-time Setup
 
 ## Enable Real-time in Supabase
 
@@ -414,64 +374,12 @@ export const ProtectedRoute = ({{ children }}) => {{
 
 ```javascript
 // hooks/useRealtime.js
-import {{ useEffect, useState }} from 'react'
-import {{ supabase }} from '../lib/supabase'
+import { useEffect, useState } from 'react'
+import { supabase } from '../lib/supabase'
 
 """
-        
-        for entity in entities:
-            table_name = entity.lower() + "s"
-            
-            realtime_doc += f"""
-export const use{entity}Subscription = () => {{
-  const [data, setData] = useState([])
-
-  useEffect(() => {{
-    // Get initial data
-    const fetchData = async () => {{
-      const {{ data: initialData }} = await supabase
-        .from('{table_name}')
-        .select('*')
-      setData(initialData || [])
-    }}
-    
-    fetchData()
-
-    // Subscribe to changes
-    const subscription = supabase
-      .channel('{table_name}_changes')
-      .on('postgres_changes', 
-        {{ 
-          event: '*', 
-          schema: 'public', 
-          table: '{table_name}' 
-        }}, 
-        (payload) => {{
-          console.log('Change received!', payload)
-          
-          if (payload.eventType === 'INSERT') {{
-            setData(prev => [...prev, payload.new])
-          }} else if (payload.eventType === 'UPDATE') {{
-            setData(prev => prev.map(item => 
-              item.id === payload.new.id ? payload.new : item
-            ))
-          }} else if (payload.eventType === 'DELETE') {{
-            setData(prev => prev.filter(item => item.id !== payload.old.id))
-          }}
-        }}
-      )
-      .subscribe()
 
-    return () => {{
-      subscription.unsubscribe()
-    }}
-  }}, [])
-
-  return data
-}}
-"""
-        
-        realtime_doc += """
+_REALTIME_FOOTER = """
 ```
 
 ## Usage in Components
@@ -492,8 +400,175 @@ export const {Entity}List = () => {
 }
 ```
 """
+
+
+class SupabaseBackendGenerator:
+    """Service for generating Supabase backend configurations and code"""
+    
+    def __init__(self):
+        # Backend specs are a pure function of (analysis, project_name);
+        # repeated generations (retries, regenerated projects) return a
+        # copy of the cached result instead of rebuilding every section
+        self._cache: LRUCache = LRUCache(maxsize=256)
+    
+    def generate_backend_specs(self, analysis: Dict[str, Any], project_name: str) -> Dict[str, str]:
+        """Generate backend specifications including database schema and API endpoints"""
+
+        if not analysis or not analysis.get("needs_backend", False):
+            return _EMPTY_SPECS
+
+        # Canonical (sorted-key) digest so dict ordering inside the
+        # analysis never fragments cache entries
+        key = hashlib.blake2b(
+            orjson.dumps(
+                [analysis, project_name],
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            ),
+            digest_size=16,
+        ).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        specs = dict(self.iter_backend_specs(analysis, project_name))
+        self._cache[key] = specs
+        # Fresh dict per call so callers can't mutate the cached copy
+        return dict(specs)
+
+    def iter_backend_specs(self, analysis: Dict[str, Any], project_name: str) -> Iterator[Tuple[str, str]]:
+        """Yield (section_name, content) pairs one section at a time.
+
+        Streaming callers (file export, chunked responses) can write
+        each section and drop it before the next is built, so peak
+        memory is one section rather than all four plus the dict.
+        generate_backend_specs wraps this to keep the dict API.
+        """
+        if not analysis or not analysis.get("needs_backend", False):
+            return
+
+        # Hash the feature list once; every downstream membership check
+        # is then a C-level set probe instead of a list scan
+        features = frozenset(analysis.get("features", []))
+
+        yield "database_schema", self._generate_database_schema(analysis, project_name, features)
+        yield "api_endpoints", self._generate_api_endpoints(analysis, project_name)
+        yield "auth_setup", self._generate_auth_setup(analysis, project_name, features)
+        yield "realtime_setup", self._generate_realtime_setup(analysis, project_name, features)
+
+    def _generate_database_schema(self, analysis: Dict, project_name: str, features: frozenset) -> str:
+        """Generate Supabase database schema SQL"""
+        entities = analysis.get("entities", [])
+        
+        # Accumulate fragments and join once at the end: repeated += on a
+        # str re-copies the whole buffer every iteration
+        parts = [f"""-- {project_name} Database Schema
+-- Generated for Supabase
+
+-- Enable necessary extensions
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+
+"""]
+
+        # Generate tables in one pass; RLS blocks must come after the
+        # auth section, so they are collected here and appended below
+        deferred_rls = []
+        for entity in entities:
+            el = entity.lower()
+            table_name = el + "s"
+            parts.append(_TABLE_DDL_TEMPLATE.format(e=entity, t=table_name))
+
+            # Add fields based on entity type: one dict probe instead
+            # of an if/elif chain rebuilding the literals
+            parts.append(_ENTITY_FIELDS.get(el, _DEFAULT_FIELDS))
+
+            parts.append(_TRIGGER_TEMPLATE.format(t=table_name))
+            deferred_rls.append(_RLS_TEMPLATE.format(t=table_name))
+        
+        # Add authentication-related tables if needed
+        if "authentication" in features:
+            parts.append("""-- User profiles table (extends Supabase auth.users)
+CREATE TABLE profiles (
+    id UUID REFERENCES auth.users(id) ON DELETE CASCADE PRIMARY KEY,
+    email VARCHAR(255),
+    name VARCHAR(255),
+    avatar_url TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Enable RLS on profiles
+ALTER TABLE profiles ENABLE ROW LEVEL SECURITY;
+
+-- Profiles are viewable by users who created them
+CREATE POLICY "Users can view own profile" ON profiles
+    FOR SELECT USING (auth.uid() = id);
+
+-- Users can update their own profile
+CREATE POLICY "Users can update own profile" ON profiles
+    FOR UPDATE USING (auth.uid() = id);
+
+-- Profiles are created when a user signs up
+CREATE OR REPLACE FUNCTION public.handle_new_user()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.profiles (id, email, name)
+    VALUES (NEW.id, NEW.email, NEW.raw_user_meta_data->>'name');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER on_auth_user_created
+    AFTER INSERT ON auth.users
+    FOR EACH ROW EXECUTE FUNCTION public.handle_new_user();
+
+""")
+        
+        # Add RLS policies for other tables (collected during the table
+        # pass; they follow the auth section as before)
+        parts.extend(deferred_rls)
+
+        return "".join(parts)
+    
+    def _generate_api_endpoints(self, analysis: Dict, project_name: str) -> str:
+        """Generate API endpoint documentation and client code"""
+        entities = analysis.get("entities", [])
+        
+        parts = [_API_HEADER_TMPL % {"project_name": project_name}]
+
+        # Generate CRUD operations for each entity
+        for entity in entities:
+            entity_name = entity.lower()
+            table_name = entity_name + "s"
+            
+            parts.append(_ENTITY_CRUD_TMPL % {"e": entity, "t": table_name, "en": entity_name})
+        
+        return "".join(parts)
+    
+    def _generate_auth_setup(self, analysis: Dict, project_name: str, features: frozenset) -> str:
+        """Generate authentication setup guide"""
+        if "authentication" not in features:
+            return ""
+        
+        return _AUTH_SETUP_TMPL % {"project_name": project_name}
+    
+    def _generate_realtime_setup(self, analysis: Dict, project_name: str, features: frozenset) -> str:
+        """Generate real-time subscriptions setup"""
+        if "realtime" not in features:
+            return ""
+        
+        entities = analysis.get("entities", [])
+        
+        parts = [_REALTIME_HEADER_TMPL % {"project_name": project_name}]
+        
+        for entity in entities:
+            table_name = entity.lower() + "s"
+            
+            parts.append(_REALTIME_HOOK_TEMPLATE.format(e=entity, t=table_name))
+        
+        parts.append(_REALTIME_FOOTER)
         
-        return realtime_doc
+        return "".join(parts)
     
 
 
@@ -0,0 +1,38 @@
+-- Fuse the ownership check and the operation on code changes into a single
+-- round trip. The routers previously issued a "verify access" SELECT followed
+-- by the real UPDATE; these functions do both atomically server-side.
+
+-- Fetch a code change only if it belongs to the given project and user
+CREATE OR REPLACE FUNCTION get_change_for_user(
+    p_change_id UUID,
+    p_project_id UUID,
+    p_user_id UUID
+) RETURNS SETOF code_changes AS $$
+    SELECT cc.*
+    FROM code_changes cc
+    JOIN tasks t ON t.id = cc.task_id
+    JOIN projects p ON p.id = t.project_id
+    WHERE cc.id = p_change_id
+      AND t.project_id = p_project_id
+      AND p.user_id = p_user_id;
+$$ LANGUAGE sql STABLE;
+
+-- Approve/reject a code change, enforcing ownership in the same statement.
+-- Returns the updated row, or nothing if the change does not exist or the
+-- user does not own the project.
+CREATE OR REPLACE FUNCTION set_change_approval(
+    p_change_id UUID,
+    p_project_id UUID,
+    p_user_id UUID,
+    p_approved BOOLEAN
+) RETURNS SETOF code_changes AS $$
+    UPDATE code_changes cc
+    SET approved = p_approved
+    FROM tasks t
+    JOIN projects p ON p.id = t.project_id
+    WHERE cc.task_id = t.id
+      AND cc.id = p_change_id
+      AND t.project_id = p_project_id
+      AND p.user_id = p_user_id
+    RETURNING cc.*;
+$$ LANGUAGE sql;
@@ -0,0 +1,22 @@
+-- Composite indexes matching the hot query shapes, so Postgres serves them
+-- with a single index scan instead of filter-then-sort.
+--
+-- CONCURRENTLY avoids locking writes during creation; run each statement
+-- outside a transaction block.
+
+-- get_chat_history: WHERE project_id = ? ORDER BY created_at DESC LIMIT n
+-- becomes an Index Scan Backward with no Sort node.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chat_messages_project_created
+    ON chat_messages(project_id, created_at DESC);
+
+-- get_projects: WHERE user_id = ? ORDER BY updated_at DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_projects_user_updated
+    ON projects(user_id, updated_at DESC);
+
+-- The single-column indexes are prefixes of the composites above and are
+-- now redundant.
+DROP INDEX CONCURRENTLY IF EXISTS idx_chat_messages_project_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_projects_user_id;
+
+-- idx_spec_files_project_id (001) already covers the spec_files lookups in
+-- chat context assembly and stays as-is.
@@ -0,0 +1,21 @@
+-- Collapse the four per-table count queries behind the project summary
+-- endpoint into one round trip. FILTER lets Postgres produce both change
+-- counts from a single scan of the project's code_changes.
+CREATE OR REPLACE FUNCTION project_summary(p_project_id UUID)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'spec_files',
+        (SELECT count(*) FROM spec_files WHERE project_id = p_project_id),
+        'total_tasks',
+        (SELECT count(*) FROM tasks WHERE project_id = p_project_id),
+        'pending_changes', ch.pending,
+        'approved_changes', ch.approved
+    )
+    FROM (
+        SELECT count(*) FILTER (WHERE cc.approved IS NULL) AS pending,
+               count(*) FILTER (WHERE cc.approved) AS approved
+        FROM code_changes cc
+        JOIN tasks t ON t.id = cc.task_id
+        WHERE t.project_id = p_project_id
+    ) ch;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,59 @@
+-- Fuse the spec-save and rollback flows (SELECT current -> INSERT snapshot
+-- -> UPDATE spec_files) into single atomic statements. Besides dropping two
+-- round trips per save, FOR UPDATE removes the race where two concurrent
+-- saves could interleave versions.
+
+-- Save: snapshot the current content into spec_versions, then bump the
+-- spec_files row with the new content.
+CREATE OR REPLACE FUNCTION bump_spec_version(
+    p_project_id UUID,
+    p_file_type TEXT,
+    p_content TEXT,
+    p_user UUID,
+    p_summary TEXT
+) RETURNS SETOF spec_files AS $$
+    WITH current AS (
+        SELECT * FROM spec_files
+        WHERE project_id = p_project_id
+          AND file_type = p_file_type
+        ORDER BY version DESC
+        LIMIT 1
+        FOR UPDATE
+    ), snapshot AS (
+        INSERT INTO spec_versions (id, spec_file_id, version, content, changes_summary, created_by)
+        SELECT uuid_generate_v4(), id, version, content, p_summary, p_user
+        FROM current
+    )
+    UPDATE spec_files sf
+    SET content = p_content,
+        version = c.version + 1
+    FROM current c
+    WHERE sf.id = c.id
+    RETURNING sf.*;
+$$ LANGUAGE sql;
+
+-- Rollback: snapshot the current content, then overwrite it with the
+-- content of the chosen historical version.
+CREATE OR REPLACE FUNCTION rollback_spec_version(
+    p_version_id UUID,
+    p_user UUID
+) RETURNS SETOF spec_files AS $$
+    WITH target AS (
+        SELECT * FROM spec_versions WHERE id = p_version_id
+    ), current AS (
+        SELECT sf.* FROM spec_files sf
+        JOIN target t ON sf.id = t.spec_file_id
+        FOR UPDATE OF sf
+    ), snapshot AS (
+        INSERT INTO spec_versions (id, spec_file_id, version, content, changes_summary, created_by)
+        SELECT uuid_generate_v4(), c.id, c.version, c.content,
+               'Before rollback to version ' || t.version, p_user
+        FROM current c, target t
+    )
+    UPDATE spec_files sf
+    SET content = t.content,
+        version = c.version + 1
+    FROM current c, target t
+    WHERE sf.id = c.id
+    RETURNING sf.*;
+$$ LANGUAGE sql;
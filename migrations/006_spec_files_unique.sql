@@ -0,0 +1,9 @@
+-- spec_files holds exactly one (current) row per project and file type;
+-- history lives in spec_versions. Enforce that layout so lookups are a
+-- unique-index equality probe instead of an ORDER BY version DESC LIMIT 1
+-- sort over the candidates.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_spec_files_project_type
+    ON spec_files(project_id, file_type);
+
+-- Superseded by the unique composite above (same leading column).
+DROP INDEX CONCURRENTLY IF EXISTS idx_spec_files_project_id;
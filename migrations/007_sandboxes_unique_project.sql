@@ -0,0 +1,15 @@
+-- A project has exactly one live sandbox row; restore replaces it in
+-- place. Deduplicate legacy rows (keeping the newest) and enforce the
+-- layout so get-or-create can be a single race-safe upsert and lookups
+-- become a unique-index equality probe instead of an
+-- ORDER BY created_at DESC LIMIT 1 sort.
+DELETE FROM sandboxes s
+USING sandboxes newer
+WHERE s.project_id = newer.project_id
+  AND (s.created_at, s.id) < (newer.created_at, newer.id);
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_sandboxes_project_unique
+    ON sandboxes(project_id);
+
+-- Superseded by the unique index above (same column).
+DROP INDEX CONCURRENTLY IF EXISTS idx_sandboxes_project_id;
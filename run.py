@@ -10,5 +10,7 @@ if __name__ == "__main__":
         host=settings.api_host,
         port=settings.api_port,
         reload=True,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )